@@ -1,9 +1,22 @@
-import os, json, time, threading, datetime as dt
+import os, json, time, threading, contextlib, datetime as dt
 from flask import Flask, jsonify, Response, request, abort
 from dotenv import load_dotenv
 from core import data_hub as DH
 from core import order_router as OR
-from core.risk import RiskManager, size_position, sector_of
+from core.risk import RiskManager, size_position, bracket_levels
+from core.bar_store import BarStore, rows_to_frame
+from core.ringstore import RingStore
+from core.eventlog import EventLog
+from core.features import FeatureEngine, featurize
+from core.pipeline import IOPool
+from core.screener import SmallcapScreener
+from core.portfolio import PortfolioSnapshot
+from core.stream import MarketStream, BarAggregator
+from core.quotes import PriceService
+from core.metrics import METRICS
+from core.broadcast import Broadcaster
+from core.cluster import Cluster
+from core import checkpoint as CK
 from strategies.balanced_trend import BalancedTrend, Config as CBalanced
 from strategies.smallcap_scalper import SmallCapScalper, Config as CScalp
 from strategies.aggr_momentum import AggressiveMomentum, Config as CMomo
@@ -21,9 +34,11 @@ def require_pin():
     pin = request.headers.get("X-PIN") or request.args.get("pin") or request.cookies.get("pin")
     if not pin or sha256(pin)!=PIN_HASH: abort(401)
 LOG_PATH = os.path.join(STATE_DIR,"events.log")
+LOG = EventLog(LOG_PATH, **CFG.get("logging",{}))
+BUS = Broadcaster(backlog={"log": ("logs", 30)}); BUS.preload("log", LOG.tail(30))   # viewers get the last 30 lines on connect
 def log(level, event, details=None):
     line = json.dumps({"ts": dt.datetime.utcnow().isoformat()+"Z", "level":level, "event":event, "details":details or {}})
-    with open(LOG_PATH,"a") as f: f.write(line+"\n")
+    LOG.write(line); BUS.publish("log", line)
 def notify(event, payload):
     OR.alert(event, payload)
 
@@ -37,121 +52,311 @@ class Orchestrator:
         self.running=False; self.thread=None; self.interval=CFG["interval_sec"]; self.paper=CFG["paper"]
         self.risk=RiskManager(CFG); self.last_tick=None; self.last_msg="Idle"; self.error=None
         self.cooldowns={}; self.panic=False
+        self.bar_store=BarStore(os.path.join(STATE_DIR,"bars")); self.features=FeatureEngine(); self.tf_locks={}
+        # bars live in preallocated rings (store.mode "ring") or are re-read from the .npy files every tick ("files")
+        if CFG.get("store",{}).get("mode","ring")=="ring": self.bar_store=RingStore.from_config(CFG, self.bar_store)
+        self.io=IOPool.from_config(CFG); self.screener=SmallcapScreener(CFG)
+        self.portfolio=None
+        self.streaming=CFG.get("run_mode","poll")=="stream"; self.warm=False; self.live=False; self.wanted={}
+        self.stream=MarketStream() if CFG.get("pricing",{}).get("stream") or self.streaming else None
+        self.aggregator=None
+        self.prices=PriceService(self.stream, CFG.get("pricing",{}).get("max_age_sec", 90))
+        cl=CFG.get("cluster",{})
+        self.cluster=Cluster(CFG, cl["workers"], STATE_DIR, cl.get("timeout_sec", 60)) if cl.get("workers") else None
         self.strategies=[
             StrategyWrapper("balanced_trend", BalancedTrend(CBalanced()), CFG, CFG["allocations"]["balanced_trend"]),
             StrategyWrapper("smallcap_scalper", SmallCapScalper(CScalp()), CFG, CFG["allocations"]["smallcap_scalper"]),
             StrategyWrapper("aggr_momentum", AggressiveMomentum(CMomo()), CFG, CFG["allocations"]["aggr_momentum"]),
         ]
+        if self.streaming:
+            self.aggregator=BarAggregator({self._universe(SW, [], [])[1] for SW in self.strategies}, CFG.get("stream",{}).get("grace_sec", 10))
+            self.stream.on("b", self.aggregator.on_bar)
+        # warm start: risk state, strategy flags, feature state and bars come back from the last checkpoint
+        ck=CFG.get("checkpoint",{}); self.ckpt_on=ck.get("enabled",True); self.ckpt_interval=ck.get("interval_sec",120)
+        self.ckpt_path=os.path.join(STATE_DIR,"checkpoint.npz"); self.checkpointed=time.time(); self.warm_pending={}
+        if self.ckpt_on: self._restore()
     def smallcap_watchlist(self):
-        out=[]
-        for s in CFG.get("symbols_universe", []):
-            px, vol = DH.last_close_and_vol(s)
-            if px is None or vol is None: continue
-            if px <= CFG["watchlist"]["smallcap_max_price"] and vol >= CFG["watchlist"]["smallcap_min_vol"]:
-                out.append(s)
-        return out[:20]  # cap size
-    def _fetch_and_feature(self, symbols, timeframe):
+        return self.screener.watchlist()
+    def _window(self):
         end = dt.datetime.utcnow().isoformat()+"Z"
         start = (dt.datetime.utcnow()-dt.timedelta(days=10)).isoformat()+"Z"
-        out={}
-        for sym in symbols:
+        return start, end
+    def _tf_lock(self, timeframe):
+        # one writer per timeframe's store slots and feature states: a fetch that outlived the tick deadline is
+        # still running in its io thread while stream bar closes and checkpoints come in
+        return self.tf_locks.setdefault(timeframe, threading.Lock())
+    @contextlib.contextmanager
+    def _all_tf_locks(self):
+        with contextlib.ExitStack() as stack:
+            for tf in sorted(self.tf_locks): stack.enter_context(self.tf_locks[tf])
+            yield
+    def _fetch_and_feature(self, symbols, timeframe):
+        start, end = self._window()
+        with self._tf_lock(timeframe):
             try:
-                df = DH.bars(sym, start, end, timeframe, 1000)
-                f = DH.add_features(df)
-                out[sym]=f
+                with METRICS.span("stage", stage="fetch", timeframe=timeframe): frames = self.bar_store.refresh(symbols, timeframe, start, end, 1000)
             except Exception as e:
-                log("ERROR","bars_failed",{"symbol":sym,"err":str(e)})
-        return out
-    def _enter_trade(self, sym, side, confidence, strategy_name):
-        try:
-            acct = OR.account(self.paper); equity=float(acct.get("equity",0)); last_equity=float(acct.get("last_equity", equity))
-        except Exception as e:
-            log("ERROR","account_failed",{"err":str(e)}); notify("account_failed",{"err":str(e)}); return
-        if self.risk.hit_daily_dd(equity, last_equity):
-            log("WARN","daily_dd_hit",{"equity":equity,"last_equity":last_equity}); notify("daily_dd_hit",{"equity":equity}); return
+                log("ERROR","bars_failed",{"timeframe":timeframe,"symbols":len(symbols),"err":str(e)}); return None
+            self.prices.observe_bars(timeframe, frames)
+            return self._featurize(frames, timeframe)
+    def _featurize(self, frames, timeframe):
+        with METRICS.span("stage", stage="features", timeframe=timeframe): return self._featurize_all(frames, timeframe)
+    def _featurize_all(self, frames, timeframe):
+        def failed(sym, e):
+            log("ERROR","features_failed",{"timeframe":timeframe,"err":str(e)} if sym is None else {"symbol":sym,"err":str(e)})
+        return featurize(frames, timeframe, CFG.get("features",{}).get("mode","incremental"), self.features, failed)
+    def _entry_price(self, sym):
+        # stream trade or this tick's bars when fresh enough; a 1Min REST fetch only as the last resort
+        px, age, src = self.prices.last(sym)
+        if px is not None: return px, src, age
         end = dt.datetime.utcnow().isoformat()+"Z"
         start = (dt.datetime.utcnow()-dt.timedelta(days=2)).isoformat()+"Z"
         df = DH.bars(sym, start, end, "1Min", 50)
-        if df is None or df.empty: return
-        px = float(df["close"].iloc[-1])
+        if df is None or df.empty: return None, None, None
+        return float(df["close"].iloc[-1]), "rest", None
+    def _enter_trade(self, sym, side, confidence, strategy_name, snap):
+        with METRICS.span("stage", stage="order"): self._place_entry(sym, side, confidence, strategy_name, snap)
+    def _place_entry(self, sym, side, confidence, strategy_name, snap):
+        px, src, age = self._entry_price(sym)
+        if px is None: snap.discard(sym); return
         qty = size_position(px, confidence, CFG["risk"]["equity_cap"], CFG["risk"]["per_trade_risk_frac"])
-        # Two-bracket approach: partial take + extended runner
-        tp_pct = {"balanced_trend":0.02,"smallcap_scalper":0.012,"aggr_momentum":0.03}.get(strategy_name,0.02)
-        sl_pct = {"balanced_trend":0.01,"smallcap_scalper":0.006,"aggr_momentum":0.015}.get(strategy_name,0.01)
-        tp1 = px*(1+tp_pct) if side=="buy" else px*(1-tp_pct)
-        sl1 = px*(1-sl_pct) if side=="buy" else px*(1+sl_pct)
+        scfg = self._strategy_by_name(strategy_name).impl.cfg
         # runner leg gets extra target; same stop (approx trailing concept via higher TP/keeping runner alive)
-        tp2 = px*(1+tp_pct*(1+CFG["router"]["trail_extra_tp_pct"])) if side=="buy" else px*(1-tp_pct*(1+CFG["router"]["trail_extra_tp_pct"]))
-        sl2 = sl1
+        tp1, sl1, tp2 = bracket_levels(px, side, scfg.tp_pct, scfg.sl_pct, CFG["router"]["trail_extra_tp_pct"]); sl2 = sl1
         try:
             if self._strategy_by_name(strategy_name).shadow:
-                log("INFO","shadow_signal",{"strategy":strategy_name,"symbol":sym,"side":side,"qty":qty,"tp1":tp1,"tp2":tp2,"sl":sl1})
+                snap.discard(sym)
+                log("INFO","shadow_signal",{"strategy":strategy_name,"symbol":sym,"side":side,"qty":qty,"tp1":tp1,"tp2":tp2,"sl":sl1,"px_src":src,"px_age":age})
             else:
                 OR.submit_split_brackets(sym, qty, "buy" if side=="buy" else "sell", tp1, sl1, tp2, sl2, self.paper)
-                log("INFO","order_submitted",{"strategy":strategy_name,"symbol":sym,"side":side,"qty":qty,"tp1":tp1,"tp2":tp2,"sl":sl1})
+                log("INFO","order_submitted",{"strategy":strategy_name,"symbol":sym,"side":side,"qty":qty,"tp1":tp1,"tp2":tp2,"sl":sl1,"px_src":src,"px_age":age})
+        except OR.LegFailed as e:
+            # part of the position is live: it keeps counting toward the symbol and sector caps
+            log("ERROR","order_partial",{"symbol":sym,"err":str(e)}); notify("order_partial",{"symbol":sym,"err":str(e)})
         except Exception as e:
+            snap.discard(sym)
             log("ERROR","order_failed",{"symbol":sym,"err":str(e)}); notify("order_failed",{"symbol":sym,"err":str(e)})
     def _strategy_by_name(self, name):
         for s in self.strategies:
             if s.name==name: return s
         return None
+    def _can_trade(self, snap):
+        if snap.equity is None:
+            err = str(snap.errors.get("account"))
+            log("ERROR","account_failed",{"err":err}); notify("account_failed",{"err":err}); return False
+        for k in ("positions","orders"):   # symbol/sector caps can't hold against a book we couldn't read
+            if k in snap.errors:
+                err = str(snap.errors[k]); log("ERROR",f"{k}_failed",{"err":err}); notify(f"{k}_failed",{"err":err}); return False
+        if self.risk.hit_daily_dd(snap.equity, snap.last_equity):
+            log("WARN","daily_dd_hit",{"equity":snap.equity,"last_equity":snap.last_equity}); notify("daily_dd_hit",{"equity":snap.equity}); return False
+        return True
+    def _universe(self, SW, core_syms, smallcap_syms):
+        if SW.name=="smallcap_scalper": return smallcap_syms, "2Min"
+        if SW.name=="balanced_trend": return core_syms, "15Min"
+        return core_syms, "5Min"
+    def _prepare(self):
+        core_syms = CFG["symbols_core"]
+        # I/O fans out on self.io (inline when pipeline.mode is "serial"); decisions stay serial
+        pending = self.portfolio.pending if self.portfolio else self.warm_pending
+        with METRICS.span("stage", stage="prepare"):
+            res = self.io.run_all({"smallcap": ("data", self.smallcap_watchlist, ()), **PortfolioSnapshot.calls(self.paper)})
+        smallcap_syms, err = res["smallcap"]
+        if err: raise err
+        snap = self.portfolio = PortfolioSnapshot.from_results(res, pending, CFG["risk"].get("pending_ttl_sec", 600))
+        self.wanted={}
+        for SW in self.strategies:
+            if not SW.enabled: continue
+            syms, tf = self._universe(SW, core_syms, smallcap_syms)
+            self.wanted.setdefault(tf,set()).update(syms)
+        if self.stream:
+            syms = list(core_syms)+list(smallcap_syms)
+            self.stream.subscribe(trades=syms, bars=syms if self.streaming else ())
+        return core_syms, smallcap_syms, snap
+    def _plan(self, core_syms, smallcap_syms):
+        plan=[]
+        for SW in self.strategies:
+            if not SW.enabled: continue
+            syms, tf = self._universe(SW, core_syms, smallcap_syms); plan.append((SW.name, tf, list(syms)))
+        return plan
+    def _from_cluster(self, res):
+        for level, event, details in res["logs"]: log(level, event, details)
+        for sym, (px, ts, src) in res["prices"].items(): self.prices.record(sym, px, ts, src)
+        return res["signals"]
+    def _decide_and_enter(self, snap, cache, core_syms, smallcap_syms, closed=None, signals=None):
+        # closed={timeframe: symbols} limits evaluation to bars that just closed (stream mode)
+        # signals={(strategy, symbol): (side, conf)} already evaluated by cluster workers replaces the cache
+        # entries are applied to the snapshot as they are chosen so the duplicate-symbol and sector caps hold within the tick
+        entries=[]
+        for SW in self.strategies:
+            if not SW.enabled: continue
+            symbols, tf = self._universe(SW, core_syms, smallcap_syms); limit=SW.max_positions
+            if closed is not None:
+                if tf not in closed: continue
+                symbols=[s for s in symbols if s in closed[tf]]
+            taken=0
+            for sym in symbols:
+                if taken>=limit: break
+                if not self.risk.can_enter_symbol(sym, snap.open_positions, snap.sector_counts): continue
+                if sym in self.cooldowns and self.risk.on_loss_cooldown(sym, self.cooldowns): continue
+                if signals is not None: side, conf = signals.get((SW.name, sym), (None, 0.0))
+                else:
+                    F = cache.get(tf,{}).get(sym)
+                    with METRICS.span("stage", stage="signal", strategy=SW.name): side, conf = SW.impl.generate_signal(F)
+                if not side: continue
+                if side=="buy" and conf < CFG["router"]["prob_long_thresh"]: continue
+                if side=="sell" and conf < CFG["router"]["prob_short_thresh"]: continue
+                entries.append((sym, side, conf, SW.name, snap)); snap.apply(sym, side, SW.name); taken+=1
+        if entries and not self._can_trade(snap):
+            for e in entries: snap.discard(e[0])
+            return
+        # no deadline: a submission still retrying past it may yet be placed, so it can't be reported as failed
+        res = self.io.run_all({i: ("broker", self._enter_trade, e) for i, e in enumerate(entries)}, deadline=False)
+        for i, (r, err) in res.items():
+            if err: log("ERROR","order_failed",{"symbol":entries[i][0],"err":str(err)})
+    def _tick(self):
+        # -> True when every timeframe's bars came back, i.e. the store is warm enough for stream mode
+        core_syms, smallcap_syms, snap = self._prepare()
+        if self.cluster:
+            with METRICS.span("stage", stage="cluster", mode="poll"):
+                res = self.cluster.poll({tf: sorted(syms) for tf, syms in self.wanted.items()}, self._plan(core_syms, smallcap_syms), *self._window())
+            self._decide_and_enter(snap, None, core_syms, smallcap_syms, signals=self._from_cluster(res))
+            return not any(ev in ("bars_failed","worker_failed") for _, ev, _ in res["logs"])
+        res = self.io.run_all({tf: ("data", self._fetch_and_feature, (sorted(syms), tf)) for tf, syms in self.wanted.items()})
+        cache = {tf: r or {} for tf, (r, err) in res.items()}
+        for tf, (r, err) in res.items():
+            if err: log("ERROR","bars_failed",{"timeframe":tf,"err":str(err)})
+        self._decide_and_enter(snap, cache, core_syms, smallcap_syms)
+        return all(r is not None and not err for r, err in res.values())
+    def _on_bars_closed(self, closed):
+        core_syms, smallcap_syms, snap = self._prepare()
+        if self.cluster:
+            closed = {tf: {s: rows for s, rows in by_sym.items() if s in self.wanted.get(tf,())} for tf, by_sym in closed.items()}
+            closed = {tf: by_sym for tf, by_sym in closed.items() if by_sym}
+            if not closed: return
+            with METRICS.span("stage", stage="cluster", mode="stream"): res = self.cluster.bars_closed(closed, self._plan(core_syms, smallcap_syms), *self._window())
+            self._decide_and_enter(snap, None, core_syms, smallcap_syms, {tf: set(by_sym) for tf, by_sym in closed.items()}, self._from_cluster(res)); return
+        cache={}; evaluated={}
+        for tf, by_sym in closed.items():
+            frames={}; cold=[]
+            with self._tf_lock(tf):
+                for sym, rows in by_sym.items():
+                    if sym not in self.wanted.get(tf,()): continue
+                    try:
+                        v=self.bar_store.append(sym, tf, rows_to_frame(rows))
+                        if v is None: cold.append(sym)
+                        elif len(v): frames[sym]=v   # empty: only stale closes, nothing to evaluate
+                    except Exception as e: log("ERROR","bars_failed",{"symbol":sym,"timeframe":tf,"err":str(e)})
+                if cold: frames.update(self._backfill(cold, tf))
+                if not frames: continue
+                self.prices.observe_bars(tf, frames); cache[tf]=self._featurize(frames, tf); evaluated[tf]=set(frames)
+        if evaluated: self._decide_and_enter(snap, cache, core_syms, smallcap_syms, evaluated)
+    def _backfill(self, symbols, timeframe):
+        # symbols first seen on the stream (e.g. just added to the watchlist) get their full history over REST
+        start, end = self._window()
+        try:
+            with METRICS.span("stage", stage="fetch", timeframe=timeframe): return self.bar_store.refresh(symbols, timeframe, start, end, 1000)
+        except Exception as e:
+            log("ERROR","bars_failed",{"timeframe":timeframe,"symbols":len(symbols),"err":str(e)}); return {}
+    def _stream_live(self):
+        # event-driven only once a polled tick has warmed the store and while the stream keeps talking
+        return (self.streaming and self.warm and self.stream.connected
+                and time.time()-self.stream.last_msg < CFG.get("stream",{}).get("stale_sec", 120))
     def _loop(self):
         while self.running:
+            wait=self.interval; ran=True
             try:
                 if self.panic: time.sleep(1); continue
                 if CFG["risk"]["skip_minutes_after_open"] and DH.is_open_now():
                     if DH.minutes_since_open() < CFG["risk"]["skip_minutes_after_open"]:
                         self.last_msg = "Skipping early session"; self.last_tick = dt.datetime.utcnow().isoformat()+"Z"; time.sleep(5); continue
-                core_syms = CFG["symbols_core"]; smallcap_syms = self.smallcap_watchlist()
-                cache={}; needed=set()
-                for SW in self.strategies:
-                    if not SW.enabled: continue
-                    if SW.name=="smallcap_scalper": [needed.add((s,"2Min")) for s in smallcap_syms]
-                    elif SW.name=="balanced_trend": [needed.add((s,"15Min")) for s in core_syms]
-                    else: [needed.add((s,"5Min")) for s in core_syms]
-                by_tf={}
-                for s,tf in needed: by_tf.setdefault(tf,set()).add(s)
-                for tf, syms in by_tf.items(): cache[tf]= self._fetch_and_feature(sorted(syms), tf)
-                try: open_pos = OR.positions(self.paper)
-                except Exception: open_pos = []
-                # sector counts for exposure caps
-                sector_counts = {}
-                for p in open_pos or []:
-                    sec = sector_of(p.get("symbol",""))
-                    sector_counts[sec] = sector_counts.get(sec,0)+1
-                for SW in self.strategies:
-                    if not SW.enabled: continue
-                    if SW.name=="smallcap_scalper": symbols=smallcap_syms; tf="2Min"; limit=SW.max_positions
-                    elif SW.name=="balanced_trend": symbols=core_syms; tf="15Min"; limit=SW.max_positions
-                    else: symbols=core_syms; tf="5Min"; limit=SW.max_positions
-                    taken=0
-                    for sym in symbols:
-                        if taken>=limit: break
-                        if not self.risk.can_enter_symbol(sym, open_pos, sector_counts): continue
-                        if sym in self.cooldowns and self.risk.on_loss_cooldown(sym, self.cooldowns): continue
-                        F = cache.get(tf,{}).get(sym)
-                        side, conf = SW.impl.generate_signal(F)
-                        if not side: continue
-                        if side=="buy" and conf < CFG["router"]["prob_long_thresh"]: continue
-                        if side=="sell" and conf < CFG["router"]["prob_short_thresh"]: continue
-                        self._enter_trade(sym, side, conf, SW.name); taken+=1
+                live=self._stream_live()
+                # closes queued while polling (the aggregator keeps rolling bars up) are stale once live again
+                if live and not self.live: self.aggregator.discard()
+                self.live=live
+                if live:
+                    wait=0; closed=self.aggregator.drain(timeout=1.0); ran=bool(closed)
+                    if not closed: continue
+                    METRICS.begin_tick()
+                    with METRICS.span("stage", stage="tick", mode="stream"): self._on_bars_closed(closed)
+                else:
+                    METRICS.begin_tick()
+                    with METRICS.span("stage", stage="tick", mode="poll"): self.warm=self._tick()
                 self.last_msg="ok"; self.error=None
             except Exception as e:
                 self.error=str(e); log("ERROR","loop_error",{"err":str(e)}); notify("loop_error",{"err":str(e)})
             finally:
-                self.last_tick = dt.datetime.utcnow().isoformat()+"Z"
+                if self.ckpt_on and time.time()-self.checkpointed >= self.ckpt_interval: self.checkpoint()
+                METRICS.end_tick()
+                if ran: self.last_tick = dt.datetime.utcnow().isoformat()+"Z"
+                self.publish()
                 slept=0
-                while self.running and slept < self.interval: time.sleep(1); slept+=1
+                # polling is the fallback: a stream that comes up mid-wait takes over right away
+                while self.running and slept < wait and not self._stream_live(): time.sleep(1); slept+=1
+        if isinstance(self.bar_store, RingStore):
+            with self._all_tf_locks(): self.bar_store.flush()   # leave the .npy files current on stop
+        if self.ckpt_on: self.checkpoint()
+    def _state(self):
+        return {"day": dt.datetime.utcnow().date().isoformat(), "daily_dd_hit": self.risk.daily_dd_hit,
+                "cooldowns": {s: u.isoformat() for s, u in self.cooldowns.items()},
+                "strategies": {s.name: {k: getattr(s, k) for k in ("enabled","shadow","trades","wins","losses")} for s in self.strategies},
+                "pending": self.portfolio.pending if self.portfolio else self.warm_pending,
+                "watchlist": {"symbols": self.screener.cached, "expires": self.screener.expires}}
+    def _stores(self):
+        # (feature engine, rings) to snapshot; in cluster mode both live in the workers, which checkpoint their own shard
+        if self.cluster: return None, None
+        return self.features, self.bar_store if isinstance(self.bar_store, RingStore) else None
+    def checkpoint(self):
+        try:
+            with METRICS.span("stage", stage="checkpoint"):
+                with self._all_tf_locks(): CK.save(self.ckpt_path, self._state(), *self._stores())
+                if self.cluster: self._from_cluster(self.cluster.checkpoint())
+        except Exception as e:
+            log("ERROR","checkpoint_failed",{"err":str(e)})
+        self.checkpointed=time.time()
+    def checkpoint_soon(self):
+        # dashboard flag changes: saved after the current tick while the loop runs, right away otherwise
+        if self.thread and self.thread.is_alive(): self.checkpointed=0
+        elif self.ckpt_on: self.checkpoint()
+    def _restore(self):
+        # panic is deliberately not restored: a restart is how a panicked orchestrator is cleared
+        try: state, info = CK.load(self.ckpt_path, *self._stores())
+        except Exception as e:
+            log("ERROR","checkpoint_failed",{"err":str(e)}); return
+        if state is None:
+            if info!="missing": log("WARN","checkpoint_skipped",{"reason":info})
+            return
+        now=dt.datetime.utcnow()
+        if state["day"]==now.date().isoformat(): self.risk.daily_dd_hit=state["daily_dd_hit"]
+        self.cooldowns={s: u for s, u in ((s, dt.datetime.fromisoformat(u)) for s, u in state["cooldowns"].items()) if u > now}
+        for s in self.strategies:
+            for k, v in state["strategies"].get(s.name,{}).items(): setattr(s, k, v)
+        self.warm_pending=state["pending"]; wl=state["watchlist"]
+        if wl["symbols"] is not None and time.time() < wl["expires"]: self.screener.cached, self.screener.expires = wl["symbols"], wl["expires"]
+        log("INFO","checkpoint_restored",info)
     def start(self):
         if self.running: return False
-        self.running=True; self.thread=threading.Thread(target=self._loop, daemon=True); self.thread.start(); return True
-    def stop(self): self.running=False
+        self.running=True; self.thread=threading.Thread(target=self._loop, daemon=True); self.thread.start()
+        if self.stream: self.stream.start()
+        if self.cluster: self.cluster.start()   # workers stay up (idle) across stop/start
+        self.publish(); return True
+    def stop(self):
+        self.running=False
+        if self.stream: self.stream.stop()
+        self.publish()
+    def status(self):
+        return {"running": self.running, "paper": self.paper, "interval": self.interval,
+                "last_tick": self.last_tick, "last_msg": self.last_msg, "error": self.error, "tick_ms": METRICS.last_tick}
+    def strategy_rows(self):
+        return [{"name":s.name,"enabled":s.enabled,"shadow":s.shadow,"alloc":s.alloc,"max_positions":s.max_positions} for s in self.strategies]
+    def publish(self):
+        # dashboard push; unchanged payloads are dropped by the broadcaster
+        BUS.publish("status", self.status(), sticky=True); BUS.publish("strategies", self.strategy_rows(), sticky=True)
 
-ORCH = Orchestrator(); app = Flask(__name__)
+ORCH = Orchestrator(); ORCH.publish(); app = Flask(__name__)
 
 @app.before_request
 def guard():
-    if request.method=="GET" and request.path in ("/","/status","/logs","/strategies"): return
+    if request.method=="GET" and request.path in ("/","/status","/logs","/strategies","/metrics","/events"): return
     require_pin()
 
 @app.get("/")
@@ -199,22 +404,27 @@ h3{ margin:6px 0; }
     <div id="strats"></div>
   </div>
 
+  <div class="card">
+    <h3>Last tick (ms per stage)</h3>
+    <pre id="stages" style="white-space:pre-wrap"></pre>
+  </div>
+
   <div class="card">
     <h3>Logs (tail 30)</h3>
     <pre id="logs" style="white-space:pre-wrap"></pre>
   </div>
 </div>
 <script>
-async function refresh(){
-  const s = await (await fetch('/status')).json();
+function renderStatus(s){
   document.getElementById('run').textContent = s.running ? 'RUNNING' : 'STOPPED';
   document.getElementById('paper').textContent = s.paper ? 'paper' : 'live';
   document.getElementById('last').textContent = s.last_tick || '—';
   document.getElementById('msg').textContent = s.last_msg || '—';
   document.getElementById('err').textContent = s.error || '—';
   document.getElementById('intv').textContent = s.interval + ' sec';
-
-  const st = await (await fetch('/strategies')).json();
+  document.getElementById('stages').textContent = Object.entries(s.tick_ms || {}).map(([k, v]) => `${k.padEnd(32)} ${v.toFixed(1)} ms`).join('\n') || '—';
+}
+function renderStrategies(st){
   const container = document.getElementById('strats');
   container.innerHTML = '';
   st.forEach(row => {
@@ -226,32 +436,36 @@ async function refresh(){
       <div>Alloc: ${(row.alloc*100).toFixed(0)}%</div>
       <div>Max positions: ${row.max_positions}</div>
       <div class="row" style="margin-top:8px">
-        <button onclick="toggle('/strategy/start?name=${row.name}')">Start</button>
-        <button onclick="toggle('/strategy/stop?name=${row.name}')">Stop</button>
-        <button onclick="toggle('/strategy/shadow?name=${row.name}')">Toggle Shadow</button>
+        <button onclick="post('/strategy/start?name=${row.name}')">Start</button>
+        <button onclick="post('/strategy/stop?name=${row.name}')">Stop</button>
+        <button onclick="post('/strategy/shadow?name=${row.name}')">Toggle Shadow</button>
       </div>`;
     container.appendChild(div);
   });
-
-  const logs = await (await fetch('/logs?n=30')).text();
-  document.getElementById('logs').textContent = logs;
 }
-async function toggle(url){ await fetch(url, {method:'POST'}); setTimeout(refresh, 200); }
-async function post(p){ await fetch(p, {method:'POST'}); setTimeout(refresh, 200); }
-setInterval(refresh, 4000); refresh();
+let logs = [];
+function renderLogs(){ document.getElementById('logs').textContent = logs.join('\n'); }
+// everything arrives over one server-sent-events stream; the browser reconnects (and gets a fresh snapshot) on its own
+const es = new EventSource('/events');
+es.addEventListener('status', e => renderStatus(JSON.parse(e.data)));
+es.addEventListener('strategies', e => renderStrategies(JSON.parse(e.data)));
+es.addEventListener('logs', e => { logs = JSON.parse(e.data); renderLogs(); });
+es.addEventListener('log', e => { logs.push(e.data); if (logs.length > 30) logs.shift(); renderLogs(); });
+async function post(p){ await fetch(p, {method:'POST'}); }
 </script>
 """
     return Response(html, mimetype="text/html")
 
 @app.get("/strategies")
 def strategies():
-    return jsonify([{"name":s.name,"enabled":s.enabled,"shadow":s.shadow,"alloc":s.alloc,"max_positions":s.max_positions} for s in ORCH.strategies])
+    return jsonify(ORCH.strategy_rows())
 
 @app.post("/strategy/start")
 def strategy_start():
     name = request.args.get("name")
     s = ORCH._strategy_by_name(name)
     if s: s.enabled=True
+    ORCH.publish(); ORCH.checkpoint_soon()
     return jsonify({"ok":True})
 
 @app.post("/strategy/stop")
@@ -259,6 +473,7 @@ def strategy_stop():
     name = request.args.get("name")
     s = ORCH._strategy_by_name(name)
     if s: s.enabled=False
+    ORCH.publish(); ORCH.checkpoint_soon()
     return jsonify({"ok":True})
 
 @app.post("/strategy/shadow")
@@ -266,14 +481,17 @@ def strategy_shadow():
     name = request.args.get("name")
     s = ORCH._strategy_by_name(name)
     if s: s.shadow = not s.shadow
+    ORCH.publish(); ORCH.checkpoint_soon()
     return jsonify({"ok":True, "shadow": s.shadow if s else None})
 
 @app.get("/status")
 def status():
-    return jsonify({
-        "running": ORCH.running, "paper": ORCH.paper, "interval": ORCH.interval,
-        "last_tick": ORCH.last_tick, "last_msg": ORCH.last_msg, "error": ORCH.error
-    })
+    mem = ORCH.bar_store.memory() if isinstance(ORCH.bar_store, RingStore) else None
+    return jsonify({**ORCH.status(), "store": mem})
+
+@app.get("/metrics")
+def metrics():
+    return Response(METRICS.render(), mimetype="text/plain; version=0.0.4")
 
 @app.post("/start")
 def start():
@@ -291,11 +509,14 @@ def panic():
 @app.get("/logs")
 def tail_logs():
     n = int(request.args.get("n","30"))
-    try:
-        with open(LOG_PATH,"r") as f: lines=f.readlines()[-n:]
-        return "".join(lines)
-    except FileNotFoundError:
-        return ""
+    lines = LOG.tail(n, request.args.get("level"), request.args.get("event"), request.args.get("symbol"))
+    return "".join(l+"\n" for l in lines)
+
+@app.get("/events")
+def events():
+    # one long-lived text/event-stream per viewer: current status/strategies and the log backlog, then pushes
+    return Response(BUS.stream(), mimetype="text/event-stream",
+                    headers={"Cache-Control":"no-cache", "X-Accel-Buffering":"no"})
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=int(os.getenv("PORT","8080")), debug=False)
@@ -0,0 +1,89 @@
+import os, sys, json, time, socket, argparse, tempfile, statistics, subprocess, tracemalloc, resource, requests
+# Full-tick benchmark. tools/fake_alpaca.py runs in its own process (synthetic data at any universe size, or a
+# recorded cassette), the app is imported against it, and for each size a fresh Orchestrator runs real
+# _tick()s: the first on an empty BarStore (cold: full history fetch), the rest warm (delta fetches). Reported
+# per size: cold and median warm wall time, the per-stage breakdown from core.metrics, and from one extra
+# traced warm tick the memory it allocated and kept plus its peak. Results can be saved as a baseline; a later
+# run against it exits 1 when any time or memory figure regresses past the tolerance.
+#   python -m bench.bench_tick --sizes 13,100,1000 --save-baseline bench/baseline.json
+#   python -m bench.bench_tick --baseline bench/baseline.json > ../bench_output.txt
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHECKED = {"cold_s": "time", "warm_s": "time", "alloc_mb": "mem", "peak_mb": "mem"}
+def _free_port():
+    with socket.socket() as s: s.bind(("127.0.0.1", 0)); return s.getsockname()[1]
+def start_server(cassette=None):
+    port = _free_port(); cmd = [sys.executable, os.path.join(ROOT, "tools", "fake_alpaca.py"), "replay" if cassette else "synth", "--port", str(port), "--rate-per-min", "100000"]
+    if cassette: cmd += ["--cassette", cassette]
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL); base = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try: requests.get(base + "/v2/account", timeout=1); return proc, base
+        except requests.ConnectionError: time.sleep(0.1)
+    proc.kill(); raise RuntimeError("fake_alpaca did not come up")
+def universe(cfg, n):
+    # the configured symbols first, then synthetic names
+    syms = list(dict.fromkeys(cfg["symbols_core"] + cfg.get("symbols_universe", [])))
+    return (syms + [f"SYN{i:04d}" for i in range(max(0, n - len(syms)))])[:n]
+def run_size(app, n, ticks, base, synthetic=True):
+    from core.metrics import METRICS
+    cfg = app.CFG
+    if n:
+        syms = universe(cfg, n); cfg["symbols_core"] = syms; cfg["symbols_universe"] = syms
+        if synthetic: requests.post(base + "/_synth/preload", json={"symbols": syms, "timeframes": ["2Min", "5Min", "15Min"]}, timeout=600)
+    app.STATE_DIR = tempfile.mkdtemp(prefix=f"bench{n}-"); orch = app.Orchestrator(); walls, stages = [], []
+    for _ in range(ticks):
+        METRICS.begin_tick(); t = time.perf_counter(); orch._tick(); walls.append(time.perf_counter() - t); METRICS.end_tick()
+        stages.append(METRICS.last_tick)
+    tracemalloc.start(); before = tracemalloc.get_traced_memory()[0]
+    orch._tick(); cur, peak = tracemalloc.get_traced_memory(); tracemalloc.stop()
+    return {"symbols": len(cfg["symbols_core"]), "cold_s": round(walls[0], 4),
+            "warm_s": round(statistics.median(walls[1:]), 4) if len(walls) > 1 else None,
+            "alloc_mb": round((cur - before) / 2**20, 2), "peak_mb": round((peak - before) / 2**20, 2),
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "store_kb_per_symbol": round(orch.bar_store.memory()["bytes_per_symbol"] / 1024, 1) if hasattr(orch.bar_store, "memory") else None,
+            "cold_stages_ms": stages[0], "warm_stages_ms": stages[-1] if len(stages) > 1 else {}}
+def compare(results, baseline, tol_time, tol_mem):
+    # -> list of regression messages; small absolute slack so millisecond noise doesn't fail a run
+    bad = []
+    for size, r in results.items():
+        b = baseline.get(size)
+        if not b: continue
+        for k, kind in CHECKED.items():
+            cur, ref = r.get(k), b.get(k)
+            if cur is None or ref is None: continue
+            tol, slack = (tol_time, 0.005) if kind == "time" else (tol_mem, 0.5)
+            if cur > ref * (1 + tol) + slack: bad.append(f"{size} symbols: {k} {cur} vs baseline {ref} (+{(cur/ref - 1)*100 if ref else float('inf'):.0f}%)")
+    return bad
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark full orchestrator ticks against a local fake Alpaca")
+    ap.add_argument("--sizes", default="13,100,1000"); ap.add_argument("--ticks", type=int, default=3)
+    ap.add_argument("--cassette", default="", help="replay a recorded cassette instead of synthetic data (uses the configured symbols)")
+    ap.add_argument("--baseline", default=""); ap.add_argument("--save-baseline", default="")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed time regression (fraction)")
+    ap.add_argument("--mem-tolerance", type=float, default=0.15); ap.add_argument("--json", default="")
+    a = ap.parse_args()
+    os.chdir(ROOT); sys.path.insert(0, ROOT)
+    proc, base = start_server(os.path.abspath(a.cassette) if a.cassette else None)
+    try:
+        os.environ.update(ALPACA_DATA_BASE=base, ALPACA_PAPER_BASE=base, STATE_DIR=tempfile.mkdtemp(prefix="bench-"), APP_PIN_SHA256="")
+        import app
+        sizes = [0] if a.cassette else [int(x) for x in a.sizes.split(",")]; results = {}
+        for n in sizes:
+            r = run_size(app, n, max(1, a.ticks), base, not a.cassette); results[str(r["symbols"])] = r
+            print(f"{r['symbols']:>5} symbols  cold {r['cold_s']:.3f}s  warm {r['warm_s'] if r['warm_s'] is not None else '-'}s  "
+                  f"alloc {r['alloc_mb']}MB  peak {r['peak_mb']}MB  rss {r['max_rss_mb']}MB  store {r['store_kb_per_symbol']}KB/symbol", flush=True)
+            for label in ("cold_stages_ms", "warm_stages_ms"):
+                for stage, ms in sorted(r[label].items(), key=lambda kv: -kv[1]): print(f"        {label[:4]} {stage:<40} {ms:>10.1f} ms")
+    finally:
+        proc.terminate()
+    if a.json:
+        with open(a.json, "w") as f: json.dump(results, f, indent=2)
+    if a.save_baseline:
+        with open(a.save_baseline, "w") as f: json.dump(results, f, indent=2)
+        print(f"baseline saved to {a.save_baseline}")
+    if a.baseline:
+        with open(a.baseline) as f: bad = compare(results, json.load(f), a.tolerance, a.mem_tolerance)
+        for m in bad: print("REGRESSION " + m)
+        if bad: sys.exit(1)
+        print("no regressions against " + a.baseline)
+if __name__ == "__main__":
+    main()
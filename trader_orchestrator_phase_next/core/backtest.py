@@ -0,0 +1,155 @@
+import os, json, heapq, bisect, argparse, numpy as np, pandas as pd
+from core import data_hub as DH
+from core.bar_store import BarStore, COLS
+from core.risk import RiskManager, size_position, bracket_levels, sector_of
+from core.order_router import split_qty
+from core.quotes import TF_SECONDS
+from strategies.balanced_trend import BalancedTrend, Config as CBalanced
+from strategies.smallcap_scalper import SmallCapScalper, Config as CScalp
+from strategies.aggr_momentum import AggressiveMomentum, Config as CMomo
+# Offline replay of the live decision path. Features come from add_features over each symbol's whole
+# history and signals from the strategies' vectorized generate_signals, so no per-bar Python runs for
+# bars without a signal. Candidate entries are then merged in time order and pushed through the same
+# RiskManager checks, size_position and split-bracket levels as _enter_trade; each leg exits at its
+# TP or the shared stop (stop wins when both print in one bar) or at the day's last close. Like the live
+# loop, nothing is entered within risk.skip_minutes_after_open of the session open.
+SESSION_OPEN_SEC = 13*3600 + 30*60   # 13:30 UTC, as data_hub.is_open_now / minutes_since_open
+def load_bars(root, timeframe, symbols=None):
+    # BarStore layout (<root>/<timeframe>/<SYMBOL>.npy) or CSV files with t,open,high,low,close,volume
+    d = os.path.join(root, timeframe); out = {}
+    if not os.path.isdir(d): return out
+    store = BarStore(root)
+    for f in sorted(os.listdir(d)):
+        sym, ext = os.path.splitext(f)
+        if symbols is not None and sym not in symbols: continue
+        if ext == ".npy": df = store.load(sym, timeframe)
+        elif ext == ".csv":
+            df = pd.read_csv(os.path.join(d, f)); df["t"] = pd.to_datetime(df["t"], utc=True); df = df.set_index("t")[COLS]
+        else: continue
+        if not df.empty: out[sym] = df.sort_index()
+    return out
+def default_strategies(cfg):
+    # same line-up and universes as the orchestrator; the scalper sees the whole universe (no daily screen)
+    return [("balanced_trend", BalancedTrend(CBalanced()), cfg["symbols_core"]),
+            ("smallcap_scalper", SmallCapScalper(CScalp()), cfg.get("symbols_universe", [])),
+            ("aggr_momentum", AggressiveMomentum(CMomo()), cfg["symbols_core"])]
+def _first(mask):
+    return int(np.argmax(mask)) if mask.any() else len(mask)
+class _Series:
+    # one strategy/symbol stream: candidate signal bars plus the bar arrays the exit search runs on
+    def __init__(self, rank, name, impl, symbol, df, cfg, F=None):
+        self.rank = rank; self.name = name; self.impl = impl; self.symbol = symbol
+        span = TF_SECONDS[impl.cfg.timeframe]
+        F = DH.add_features(df) if F is None else F
+        side, conf = impl.generate_signals(F) if "rsi" in F else (np.zeros(0, dtype=np.int8), np.zeros(0))
+        ok = ((side > 0) & (conf >= cfg["router"]["prob_long_thresh"])) | ((side < 0) & (conf >= cfg["router"]["prob_short_thresh"]))
+        t = (df.index - pd.Timestamp(0, tz="UTC")).total_seconds().to_numpy()
+        self.end = t + span   # a bar's values are known once it closes
+        self.high = df["high"].to_numpy(np.float64); self.low = df["low"].to_numpy(np.float64); self.close = df["close"].to_numpy(np.float64)
+        day = (t // 86400).astype(np.int64); self.day_last = np.searchsorted(day, day, side="right") - 1
+        rows = np.flatnonzero(ok); self.pos = df.index.get_indexer(F.index[rows])
+        skip = cfg["risk"].get("skip_minutes_after_open", 0) * 60
+        if skip:   # decided at the bar's close, which the live loop skips that early in the session
+            since_open = self.end[self.pos] % 86400 - SESSION_OPEN_SEC; keep = ~((since_open >= 0) & (since_open < skip))
+            rows = rows[keep]; self.pos = self.pos[keep]
+        self.side = side[rows]; self.conf = conf[rows]; self.when = self.end[self.pos].tolist(); self.i = 0
+    def has_next(self): return self.i < len(self.pos)
+    def key(self): return (self.when[self.i], self.rank)
+    def skip_until(self, ts): self.i = max(self.i+1, bisect.bisect_left(self.when, ts))
+    def exits(self, k, side, tps, sl):
+        # (exit index, exit price) per TP leg; stop first on ties, day's last close if neither prints
+        e = self.day_last[k]; h = self.high[k+1:e+1]; l = self.low[k+1:e+1]
+        s = _first(l <= sl) if side > 0 else _first(h >= sl); out = []
+        for tp in tps:
+            j = _first(h >= tp) if side > 0 else _first(l <= tp)
+            if j < s and j < len(h): out.append((k+1+j, tp))
+            elif s < len(h): out.append((k+1+s, sl))
+            else: out.append((e, self.close[e]))
+        return out
+class Backtester:
+    def __init__(self, cfg, cost_bps=0.0):
+        self.cfg = cfg; self.cost = cost_bps / 1e4
+    def run(self, bars, strategies=None, features=None):
+        # bars: {timeframe: {symbol: frame}}; strategies: [(name, impl, symbols)] in live evaluation order;
+        # features: optional {(timeframe, symbol): add_features frame} memo reused across runs
+        cfg = self.cfg; risk = RiskManager(cfg); strategies = strategies or default_strategies(cfg)
+        series = []
+        for r, (name, impl, symbols) in enumerate(strategies):
+            frames = bars.get(impl.cfg.timeframe, {})
+            for j, sym in enumerate(symbols):
+                df = frames.get(sym)
+                if df is None or len(df) < 2: continue
+                F = None
+                if features is not None:
+                    key = (impl.cfg.timeframe, sym); F = features.get(key)
+                    if F is None: F = features[key] = DH.add_features(df)
+                series.append(_Series((r, j), name, impl, sym, df, cfg, F))
+        heap = [(s.key(), n) for n, s in enumerate(series) if s.has_next()]; heapq.heapify(heap)
+        equity = day_equity = float(cfg["risk"]["equity_cap"]); cur_day = None
+        open_, held, held_list, sector_counts, taken, trades = [], {}, [], {}, {}, []
+        extra = cfg["router"]["trail_extra_tp_pct"]
+        while heap:
+            (ts, _), n = heapq.heappop(heap); s = series[n]
+            while open_ and open_[0][0] <= ts:
+                _, _, tr = heapq.heappop(open_); equity += tr["pnl"]; del held[tr["symbol"]]
+                sector_counts[sector_of(tr["symbol"])] -= 1; held_list = [{"symbol": x} for x in held]
+            day = int(ts // 86400)
+            if day != cur_day: cur_day = day; day_equity = equity; risk.reset_day(); taken = {}
+            if risk.daily_dd_hit or risk.hit_daily_dd(equity, day_equity): s.skip_until((day+1)*86400)
+            elif not risk.can_enter_symbol(s.symbol, held_list, sector_counts):
+                # blocked until this symbol's position closes, or until anything closes for a sector cap
+                s.skip_until(held[s.symbol]["exit_ts"] if s.symbol in held else (open_[0][0] if open_ else ts+1))
+            elif taken.get((s.name, ts), 0) >= s.impl.cfg.max_positions: s.skip_until(ts+1e-9)
+            else:
+                tr = self._trade(s, extra)
+                if tr is None: s.skip_until(ts+1e-9)
+                else:
+                    taken[(s.name, ts)] = taken.get((s.name, ts), 0) + 1
+                    trades.append(tr); held[s.symbol] = tr; heapq.heappush(open_, (tr["exit_ts"], len(trades), tr))
+                    held_list = [{"symbol": x} for x in held]
+                    sec = sector_of(s.symbol); sector_counts[sec] = sector_counts.get(sec,0)+1
+                    s.skip_until(tr["exit_ts"])
+            if s.has_next(): heapq.heappush(heap, (s.key(), n))
+        return BacktestResult(trades, cfg["risk"]["equity_cap"])
+    def _trade(self, s, extra):
+        k = int(s.pos[s.i]); side = int(s.side[s.i]); conf = float(s.conf[s.i]); px = float(s.close[k])
+        if s.day_last[k] <= k: return None   # signal on the session's last bar: nothing left to trade into
+        qty = size_position(px, conf, self.cfg["risk"]["equity_cap"], self.cfg["risk"]["per_trade_risk_frac"])
+        tp1, sl, tp2 = bracket_levels(px, "buy" if side > 0 else "sell", s.impl.cfg.tp_pct, s.impl.cfg.sl_pct, extra)
+        legs = s.exits(k, side, (tp1, tp2), sl); pnl = 0.0
+        for q, (j, xp) in zip(split_qty(qty), legs): pnl += side*(xp - px)*q - self.cost*(px + xp)*q
+        last = max(j for j, _ in legs)
+        return {"strategy": s.name, "symbol": s.symbol, "side": "buy" if side > 0 else "sell", "conf": conf, "qty": qty,
+                "entry_ts": float(s.end[k]), "entry_px": px, "exit_ts": float(s.end[last]),
+                "exit_px1": float(legs[0][1]), "exit_px2": float(legs[1][1]), "pnl": pnl}
+class BacktestResult:
+    def __init__(self, trades, equity_cap):
+        self.trades = pd.DataFrame(trades, columns=["strategy","symbol","side","conf","qty","entry_ts","entry_px","exit_ts","exit_px1","exit_px2","pnl"])
+        for c in ("entry_ts","exit_ts"): self.trades[c] = pd.to_datetime(self.trades[c], unit="s", utc=True)
+        self.equity_cap = equity_cap
+    def equity(self):
+        t = self.trades.sort_values("exit_ts")
+        return pd.Series(self.equity_cap + t["pnl"].cumsum().to_numpy(), index=t["exit_ts"])
+    def summary(self):
+        rows = []
+        for name, g in list(self.trades.groupby("strategy")) + [("total", self.trades)]:
+            pnl = g.sort_values("exit_ts")["pnl"].to_numpy(); curve = np.cumsum(pnl)
+            dd = float(np.max(np.maximum.accumulate(np.concatenate([[0.0], curve]))[1:] - curve)) if len(curve) else 0.0
+            rows.append({"strategy": name, "trades": len(g), "wins": int((pnl > 0).sum()), "losses": int((pnl <= 0).sum()),
+                         "win_rate": float((pnl > 0).mean()) if len(pnl) else 0.0, "pnl": float(pnl.sum()),
+                         "avg_pnl": float(pnl.mean()) if len(pnl) else 0.0, "max_dd": dd})
+        return pd.DataFrame(rows).set_index("strategy")
+def main():
+    ap = argparse.ArgumentParser(description="Backtest the orchestrator strategies over local bar files")
+    ap.add_argument("--data", default=os.path.join(os.getenv("STATE_DIR","./state"), "bars"))
+    ap.add_argument("--config", default="config.json"); ap.add_argument("--strategies", default="")
+    ap.add_argument("--cost-bps", type=float, default=0.0); ap.add_argument("--trades-out", default="")
+    a = ap.parse_args()
+    with open(a.config) as f: cfg = json.load(f)
+    strategies = [s for s in default_strategies(cfg) if not a.strategies or s[0] in a.strategies.split(",")]
+    bars = {impl.cfg.timeframe: load_bars(a.data, impl.cfg.timeframe) for _, impl, _ in strategies}
+    res = Backtester(cfg, a.cost_bps).run(bars, strategies)
+    print(res.summary().to_string())
+    if a.trades_out: res.trades.to_csv(a.trades_out, index=False)
+if __name__ == "__main__":
+    main()
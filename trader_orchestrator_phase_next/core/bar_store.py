@@ -0,0 +1,76 @@
+import os, numpy as np, pandas as pd
+from core import data_hub as DH
+COLS = ["open","high","low","close","volume"]
+EPOCH = pd.Timestamp(0, tz="UTC")
+DELTA_BUCKET_SEC = 3600   # warm symbols whose last bars lie within this span share one delta request
+# One columnar .npy per symbol/timeframe: shape (6, n) = [t (epoch sec), open, high, low, close, volume].
+# Files are memory-mapped on read and replaced atomically on write, so each tick only pulls bars newer
+# than the last stored timestamp and a restart starts warm.
+def _iso(ts):
+    return ts.tz_convert("UTC").strftime("%Y-%m-%dT%H:%M:%SZ")
+def to_array(df):
+    t = (df.index - EPOCH).total_seconds().to_numpy()
+    return np.vstack([t] + [df[c].to_numpy(dtype=np.float64) for c in COLS])
+def from_array(arr):
+    if arr is None or arr.shape[1] == 0: return pd.DataFrame()
+    idx = pd.to_datetime(np.asarray(arr[0]), unit="s", utc=True); idx.name = "t"
+    return pd.DataFrame({c: np.array(arr[i+1]) for i, c in enumerate(COLS)}, index=idx)
+def delta_groups(last, span=DELTA_BUCKET_SEC):
+    # {symbol: last epoch sec} -> [(since, symbols)]: one delta request per group, each starting at its own oldest
+    # last bar, so a halted symbol (or one back on the watchlist after days) doesn't drag every other symbol back
+    groups = []
+    for s, t in sorted(last.items(), key=lambda kv: kv[1]):
+        if groups and t - groups[-1][0] <= span: groups[-1][1].append(s)
+        else: groups.append((t, [s]))
+    return groups
+def rows_to_frame(rows):
+    # bar dicts with "t" in epoch seconds (as produced by stream.BarAggregator) -> store-shaped frame
+    idx = pd.to_datetime([r["t"] for r in rows], unit="s", utc=True); idx.name = "t"
+    return pd.DataFrame({c: [float(r[c]) for r in rows] for c in COLS}, index=idx)
+class BarStore:
+    def __init__(self, root):
+        self.root = root; os.makedirs(root, exist_ok=True)
+    def _path(self, symbol, timeframe):
+        return os.path.join(self.root, timeframe, f"{symbol}.npy")
+    def load(self, symbol, timeframe):
+        try: return from_array(np.load(self._path(symbol, timeframe), mmap_mode="r"))
+        except (FileNotFoundError, ValueError, OSError): return pd.DataFrame()
+    def last_ts(self, symbol, timeframe):
+        try: arr = np.load(self._path(symbol, timeframe), mmap_mode="r")
+        except (FileNotFoundError, ValueError, OSError): return None
+        return pd.Timestamp(float(arr[0, -1]), unit="s", tz="UTC") if arr.shape[1] else None
+    def save(self, symbol, timeframe, df):
+        p = self._path(symbol, timeframe); os.makedirs(os.path.dirname(p), exist_ok=True)
+        tmp = p + ".tmp"
+        with open(tmp, "wb") as f: np.save(f, to_array(df))
+        os.replace(tmp, p)
+    def append(self, symbol, timeframe, bars, limit=1000):
+        # merge bars that arrived from the stream: a bar with the last stored timestamp replaces it, newer ones are
+        # appended and older ones (late or replayed closes) are dropped; an empty frame when nothing was newer.
+        # None when the symbol has no REST history yet: seeding it with stream bars would make refresh treat it as warm forever
+        old = self.load(symbol, timeframe)
+        if old.empty: return None
+        bars = bars[~bars.index.duplicated(keep="last")].sort_index(); bars = bars[bars.index >= old.index[-1]]
+        if bars.empty: return bars
+        df = pd.concat([old[old.index < bars.index[0]], bars]).iloc[-limit:]; self.save(symbol, timeframe, df)
+        return df
+    def refresh(self, symbols, timeframe, start, end, limit=1000):
+        start_ts = pd.Timestamp(start); frames = {}; cold = []
+        for s in dict.fromkeys(symbols):
+            df = self.load(s, timeframe)
+            if df.empty or df.index[-1] < start_ts: cold.append(s)
+            else: frames[s] = df
+        fetched = DH.bars_multi(cold, start, end, timeframe, limit) if cold else {}
+        if frames:
+            # re-request from each group's oldest last bar (inclusive) so a partially formed last bar gets replaced
+            for t0, syms in delta_groups({s: df.index[-1].timestamp() for s, df in frames.items()}):
+                delta = DH.bars_multi(syms, _iso(pd.Timestamp(t0, unit="s", tz="UTC")), end, timeframe, 0)
+                for s, d in delta.items():
+                    if d.empty: continue
+                    old = frames[s]; d = d[d.index >= old.index[-1]]
+                    if d.empty: continue
+                    fetched[s] = pd.concat([old[old.index < d.index[0]], d])
+        for s, df in fetched.items():
+            if df.empty: continue
+            frames[s] = df[df.index >= start_ts].iloc[-limit:]; self.save(s, timeframe, frames[s])
+        return {s: df[df.index >= start_ts].iloc[-limit:] for s, df in frames.items()}
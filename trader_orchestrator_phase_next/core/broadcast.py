@@ -0,0 +1,48 @@
+import json, queue, threading
+from collections import deque
+class Broadcaster:
+    # In-process fan-out for the dashboard's server-sent events. Publishers pay one put per connected viewer;
+    # "sticky" events (status, strategies) keep their last payload, which a new subscriber is sent first and
+    # which suppresses re-publishing an unchanged value. backlog={event: (snapshot_event, n)} keeps the last n
+    # payloads of an event (the log lines) and sends them to a new subscriber as one snapshot_event holding a
+    # JSON list; the snapshot is taken under the same lock as publish, so nothing falls between it and the
+    # live messages. A viewer that falls behind loses its oldest messages.
+    def __init__(self, maxsize=256, heartbeat=15, backlog=None):
+        self.subs = set(); self.last = {}; self.lock = threading.Lock(); self.maxsize = maxsize; self.heartbeat = heartbeat
+        self.backlog = {e: (snap, deque(maxlen=n)) for e, (snap, n) in (backlog or {}).items()}
+    def preload(self, event, items):
+        # seed a backlog (e.g. from the log file at start-up)
+        with self.lock: self.backlog[event][1].extend(items)
+    def publish(self, event, data, sticky=False):
+        msg = f"event: {event}\ndata: {data if isinstance(data, str) else json.dumps(data)}\n\n"
+        with self.lock:
+            if sticky:
+                if self.last.get(event) == msg: return
+                self.last[event] = msg
+            if event in self.backlog: self.backlog[event][1].append(data)
+            subs = list(self.subs)
+        for q in subs:
+            try: q.put_nowait(msg)
+            except queue.Full:
+                try: q.get_nowait()
+                except queue.Empty: pass
+                try: q.put_nowait(msg)
+                except queue.Full: pass
+    def subscribe(self):
+        q = queue.Queue(self.maxsize)
+        with self.lock:
+            for msg in self.last.values(): q.put_nowait(msg)
+            for snap, items in self.backlog.values(): q.put_nowait(f"event: {snap}\ndata: {json.dumps(list(items))}\n\n")
+            self.subs.add(q)
+        return q
+    def unsubscribe(self, q):
+        with self.lock: self.subs.discard(q)
+    def stream(self, initial=()):
+        # generator for a text/event-stream response; ends (and unsubscribes) when the client goes away
+        q = self.subscribe()
+        try:
+            for event, data in initial: yield f"event: {event}\ndata: {data if isinstance(data, str) else json.dumps(data)}\n\n"
+            while True:
+                try: yield q.get(timeout=self.heartbeat)
+                except queue.Empty: yield ": ping\n\n"
+        finally: self.unsubscribe(q)
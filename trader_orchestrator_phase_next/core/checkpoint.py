@@ -0,0 +1,35 @@
+import os, json, time, numpy as np
+# Warm-start snapshot: one uncompressed .npz in STATE_DIR holding a JSON state dict (whatever the owner wants
+# back: risk state, strategy flags, pending entries...), the FeatureEngine states packed as float rows and,
+# for a RingStore, every slot's bar window. Written to a temp file and renamed, so a crash mid-write leaves
+# the previous snapshot in place. Loading restores the engine and rings directly: the first tick after a
+# restart only fetches the bars that closed while the process was down and pushes just those through the
+# feature state. Feature states carry their last timestamp, so a stale snapshot degrades to a cold start.
+VERSION = 1
+def save(path, state, engine=None, store=None):
+    # -> bytes written
+    arrays = {}; meta = {"version": VERSION, "saved_at": time.time(), "state": state, "features": [], "bars": []}
+    if engine is not None and engine.states:
+        meta["features"], arrays["f_state"], arrays["f_prev"] = engine.export()
+    if store is not None:
+        for j, (tf, (names, t, x, n)) in enumerate(store.export().items()):
+            meta["bars"].append({"timeframe": tf, "symbols": names})
+            arrays[f"t{j}"], arrays[f"x{j}"], arrays[f"n{j}"] = t, x, n
+    arrays["meta"] = np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f: np.savez(f, **arrays)
+    os.replace(tmp, path)
+    return os.path.getsize(path)
+def load(path, engine=None, store=None, keep=None):
+    # -> (state, info) or (None, reason); keep(symbol) limits which symbols' features and bars are taken
+    if not os.path.exists(path): return None, "missing"
+    with np.load(path) as z:
+        meta = json.loads(z["meta"].tobytes())
+        if meta.get("version") != VERSION: return None, f"version {meta.get('version')}"
+        info = {"age_sec": round(time.time() - meta["saved_at"], 1), "features": 0, "bars": 0}
+        if engine is not None and meta["features"]:
+            info["features"] = engine.restore(meta["features"], z["f_state"], z["f_prev"], keep)
+        if store is not None:
+            for j, b in enumerate(meta["bars"]):
+                info["bars"] += store.restore(b["timeframe"], b["symbols"], z[f"t{j}"], z[f"x{j}"], z[f"n{j}"], keep)
+    return meta["state"], info
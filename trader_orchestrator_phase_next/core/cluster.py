@@ -0,0 +1,160 @@
+import os, sys, time, zlib, signal, socket, threading, contextlib, subprocess
+from multiprocessing.connection import Connection
+from core.bar_store import BarStore, rows_to_frame
+from core.ringstore import RingStore
+from core.features import FeatureEngine, featurize
+from core.pipeline import IOPool
+from core.quotes import PriceService
+from core.backtest import default_strategies
+from core import checkpoint as CK
+# Multi-process mode. The app process stays the coordinator: it owns the portfolio snapshot, RiskManager,
+# cooldowns and order entry. Each worker process owns the symbols that hash to it (every timeframe of a
+# symbol lands on the same worker, so its BarStore files and feature state have a single writer), fetches
+# and featurizes them and evaluates the strategies over them. Per tick the coordinator sends each worker
+# its shard of the plan over its socket and gets back only the signals that fired, the latest bar prices and
+# any log events; risk arbitration then runs serially on the coordinator in the usual strategy order.
+# Workers are plain `python -m core.cluster <fd>` children talking over a private socketpair, so they
+# never re-import the app module (as multiprocessing's spawn would) and exit when the coordinator goes away.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+def _evaluate(impls, plan, feats, out):
+    for name, tf, symbols in plan:
+        impl = impls.get(name); F = feats.get(tf, {})
+        for sym in symbols:
+            if sym not in F: continue
+            side, conf = impl.generate_signal(F[sym])
+            if side: out["signals"][(name, sym)] = (side, conf)
+def _shard(symbol, n):
+    return zlib.crc32(symbol.encode()) % n
+def _worker(conn, cfg, state_dir, index, n):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)   # the coordinator decides when workers stop
+    store = BarStore(os.path.join(state_dir, "bars"))
+    if cfg.get("store", {}).get("mode", "ring") == "ring": store = RingStore.from_config(cfg, store)
+    engine = FeatureEngine(); io = IOPool.from_config(cfg)
+    ring = store if isinstance(store, RingStore) else None; ckpt = os.path.join(state_dir, f"checkpoint-worker{index}.npz")
+    ckpt_on = cfg.get("checkpoint", {}).get("enabled", True); restored = None
+    if ckpt_on:
+        # only this worker's own symbols: the worker count may have changed since the snapshot
+        try: restored = CK.load(ckpt, engine, ring, lambda s: _shard(s, n) == index)[1]
+        except Exception as e: restored = {"err": str(e)}
+    impls = {name: impl for name, impl, _ in default_strategies(cfg)}; mode = cfg.get("features", {}).get("mode", "incremental")
+    locks = {}   # per timeframe, as in the app: a fetch past the io deadline keeps writing its block and feature states
+    def lock(tf): return locks.setdefault(tf, threading.Lock())
+    while True:
+        try: msg = conn.recv()
+        except (EOFError, OSError): break
+        if msg is None: break
+        kind, job = msg; out = {"signals": {}, "prices": {}, "logs": []}; prices = PriceService(); feats = {}
+        if isinstance(restored, dict):
+            out["logs"].append(("ERROR" if "err" in restored else "INFO", "checkpoint_restored", {"worker": index, **restored})); restored = None
+        def failed(sym, e, tf):
+            out["logs"].append(("ERROR", "features_failed", {"timeframe": tf, "err": str(e)} if sym is None else {"symbol": sym, "err": str(e)}))
+        try:
+            if kind == "poll":
+                def fetch(syms, tf, job=job, prices=prices, failed=failed):   # bound now: a late call must not write into the next job
+                    with lock(tf):
+                        frames = store.refresh(syms, tf, job["start"], job["end"], 1000)
+                        prices.observe_bars(tf, frames); return featurize(frames, tf, mode, engine, lambda s, e: failed(s, e, tf))
+                calls = {tf: ("data", fetch, (syms, tf)) for tf, syms in job["wanted"].items() if syms}
+                for tf, (f, err) in io.run_all(calls).items():
+                    if err: out["logs"].append(("ERROR", "bars_failed", {"timeframe": tf, "symbols": len(job["wanted"][tf]), "err": str(err)})); continue
+                    feats[tf] = f
+            elif kind == "bars":
+                for tf, by_sym in job["closed"].items():
+                    with lock(tf):
+                        frames = {}; cold = []
+                        for sym, rows in by_sym.items():
+                            try:
+                                v = store.append(sym, tf, rows_to_frame(rows))
+                                if v is None: cold.append(sym)
+                                elif len(v): frames[sym] = v
+                            except Exception as e: out["logs"].append(("ERROR", "bars_failed", {"symbol": sym, "timeframe": tf, "err": str(e)}))
+                        if cold:   # no history yet: backfill over REST instead of seeding from the stream
+                            try: frames.update(store.refresh(cold, tf, job["start"], job["end"], 1000))
+                            except Exception as e: out["logs"].append(("ERROR", "bars_failed", {"timeframe": tf, "symbols": len(cold), "err": str(e)}))
+                        prices.observe_bars(tf, frames); feats[tf] = featurize(frames, tf, mode, engine, lambda s, e, tf=tf: failed(s, e, tf))
+            elif ckpt_on:   # "checkpoint"
+                with contextlib.ExitStack() as stack:
+                    for tf in sorted(locks): stack.enter_context(locks[tf])
+                    CK.save(ckpt, {}, engine, ring)
+            _evaluate(impls, job.get("plan", []), feats, out)
+        except Exception as e:
+            out["logs"].append(("ERROR", "worker_failed", {"worker": os.getpid(), "err": str(e)}))
+        out["prices"] = prices.prices
+        try: conn.send(out)
+        except (EOFError, OSError): break
+class Cluster:
+    def __init__(self, cfg, workers, state_dir, timeout=60):
+        self.cfg = cfg; self.n = workers; self.state_dir = state_dir; self.timeout = timeout
+        self.procs = [None]*workers; self.conns = [None]*workers
+    def shard(self, symbol):
+        return _shard(symbol, self.n)
+    def _spawn(self, i):
+        a, b = socket.socketpair()
+        p = subprocess.Popen([sys.executable, "-m", "core.cluster", str(b.fileno())], pass_fds=(b.fileno(),), cwd=ROOT)
+        b.close(); conn = Connection(a.detach()); conn.send((self.cfg, self.state_dir, i, self.n))
+        self.procs[i] = p; self.conns[i] = conn
+    def start(self):
+        for i in range(self.n):
+            if self.procs[i] is None or self.procs[i].poll() is not None: self._spawn(i)
+    def _kill(self, i, graceful=False):
+        p, c = self.procs[i], self.conns[i]
+        if p is None: return
+        if graceful:
+            try: c.send(None)
+            except (EOFError, OSError): pass
+        try: p.wait(5 if graceful else 0.1)
+        except subprocess.TimeoutExpired: p.terminate(); p.wait(5)
+        c.close(); self.procs[i] = self.conns[i] = None
+    def stop(self):
+        for i in range(self.n): self._kill(i, graceful=True)
+    def _restart(self, i):
+        self._kill(i); self._spawn(i)
+    def _split(self, plan):
+        parts = [[] for _ in range(self.n)]
+        for name, tf, symbols in plan:
+            by = [[] for _ in range(self.n)]
+            for s in symbols: by[self.shard(s)].append(s)
+            for i in range(self.n): parts[i].append((name, tf, by[i]))
+        return parts
+    def _run(self, jobs):
+        # jobs: per-worker (kind, job) or None; a worker that errors or misses the deadline is restarted and its shard skipped this round
+        self.start(); merged = {"signals": {}, "prices": {}, "logs": []}; sent = []
+        for i, job in enumerate(jobs):
+            if job is None: continue
+            try: self.conns[i].send(job); sent.append(i)
+            except (EOFError, OSError) as e:
+                merged["logs"].append(("ERROR", "worker_failed", {"worker": i, "err": str(e)})); self._restart(i)
+        deadline = time.time() + self.timeout
+        for i in sent:
+            try:
+                if not self.conns[i].poll(max(0.0, deadline - time.time())): raise TimeoutError(f"worker {i} timed out")
+                out = self.conns[i].recv()
+            except (EOFError, OSError, TimeoutError) as e:
+                merged["logs"].append(("ERROR", "worker_failed", {"worker": i, "err": str(e) or type(e).__name__})); self._restart(i); continue
+            merged["signals"].update(out["signals"]); merged["logs"].extend(out["logs"])
+            for sym, v in out["prices"].items():
+                cur = merged["prices"].get(sym)
+                if cur is None or v[1] >= cur[1]: merged["prices"][sym] = v
+        return merged
+    def checkpoint(self):
+        # every worker snapshots its own engine and rings to STATE_DIR/checkpoint-worker<i>.npz
+        return self._run([("checkpoint", {})]*self.n)
+    def poll(self, wanted, plan, start, end):
+        # wanted {timeframe: symbols} and plan [(strategy, timeframe, symbols)] as in a polled tick
+        parts = self._split(plan); jobs = []
+        for i in range(self.n):
+            w = {tf: [s for s in syms if self.shard(s) == i] for tf, syms in wanted.items()}
+            jobs.append(("poll", {"wanted": w, "plan": parts[i], "start": start, "end": end}) if any(w.values()) else None)
+        return self._run(jobs)
+    def bars_closed(self, closed, plan, start, end):
+        # closed {timeframe: {symbol: [bar dicts]}} from the stream aggregator; start/end window for backfills
+        parts = self._split(plan); jobs = []
+        for i in range(self.n):
+            c = {tf: {s: rows for s, rows in by_sym.items() if self.shard(s) == i} for tf, by_sym in closed.items()}
+            jobs.append(("bars", {"closed": c, "plan": parts[i], "start": start, "end": end}) if any(c.values()) else None)
+        return self._run(jobs)
+def main():
+    conn = Connection(int(sys.argv[1])); cfg, state_dir, index, n = conn.recv()
+    _worker(conn, cfg, state_dir, index, n)
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,69 @@
 import os, datetime as dt, requests, pandas as pd
 from dotenv import load_dotenv
+from core.metrics import METRICS
 load_dotenv()
 ALPACA_KEY = os.getenv("ALPACA_KEY_ID","")
 ALPACA_SECRET = os.getenv("ALPACA_SECRET_KEY","")
-DATA_BASE = "https://data.alpaca.markets"
+DATA_BASE = os.getenv("ALPACA_DATA_BASE","https://data.alpaca.markets")
+MULTI_CHUNK = 100      # symbols per multi-symbol request (keeps the query string short)
+MULTI_PAGE_LIMIT = 10000
+SNAPSHOT_CHUNK = 500
+SESSION = requests.Session()
+SESSION.mount("https://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16))
+SESSION.mount("http://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16))
 def alpaca_headers():
     return {"APCA-API-KEY-ID": ALPACA_KEY, "APCA-API-SECRET-KEY": ALPACA_SECRET}
-def bars(symbol, start, end, timeframe="5Min", limit=1000):
-    url = f"{DATA_BASE}/v2/stocks/{symbol}/bars"
-    r = requests.get(url, headers=alpaca_headers(), params={
-        "timeframe": timeframe, "start": start, "end": end, "limit": limit, "adjustment":"all"
-    }, timeout=20)
-    r.raise_for_status()
-    js = r.json().get("bars", [])
+def _get(endpoint, url, params, timeout=20):
+    with METRICS.span("http_request", api="data", endpoint=endpoint):
+        r = SESSION.get(url, headers=alpaca_headers(), params=params, timeout=timeout)
+        r.raise_for_status(); return r
+def _frame(js):
     if not js: return pd.DataFrame()
     df = pd.DataFrame(js)
     df["t"] = pd.to_datetime(df["t"]); df.set_index("t", inplace=True)
     df.rename(columns={"o":"open","h":"high","l":"low","c":"close","v":"volume"}, inplace=True)
     return df[["open","high","low","close","volume"]]
+def _chunks(seq, n):
+    seq = list(dict.fromkeys(seq))
+    return [seq[i:i+n] for i in range(0, len(seq), n)]
+def bars(symbol, start, end, timeframe="5Min", limit=1000):
+    url = f"{DATA_BASE}/v2/stocks/{symbol}/bars"
+    r = _get("bars", url, params={
+        "timeframe": timeframe, "start": start, "end": end, "limit": limit, "adjustment":"all"
+    }, timeout=20)
+    return _frame(r.json().get("bars") or [])
+def bars_multi(symbols, start, end, timeframe="5Min", limit=1000):
+    # one paginated request per chunk of symbols instead of one per symbol; keeps the last `limit` bars each
+    out = {}
+    for chunk in _chunks(symbols, MULTI_CHUNK):
+        raw = {s: [] for s in chunk}; token = None
+        while True:
+            params = {"symbols": ",".join(chunk), "timeframe": timeframe, "start": start, "end": end,
+                      "limit": MULTI_PAGE_LIMIT, "adjustment":"all"}
+            if token: params["page_token"] = token
+            js = _get("bars_multi", f"{DATA_BASE}/v2/stocks/bars", params, timeout=20).json()
+            for s, rows in (js.get("bars") or {}).items(): raw.setdefault(s, []).extend(rows)
+            token = js.get("next_page_token")
+            if not token: break
+        for s in chunk:
+            df = _frame(raw.get(s))
+            out[s] = df.iloc[-limit:] if limit and len(df) > limit else df
+    return out
 def last_close_and_vol(symbol):
     end = dt.datetime.utcnow().isoformat()+"Z"
     start = (dt.datetime.utcnow()-dt.timedelta(days=5)).isoformat()+"Z"
     df = bars(symbol, start, end, "1Day", 5)
     if df is None or df.empty: return None, None
     return float(df["close"].iloc[-1]), float(df["volume"].iloc[-1])
+def snapshots(symbols):
+    # {symbol: (last daily close, daily volume)} for a whole universe, a few requests total
+    out = {}
+    for chunk in _chunks(symbols, SNAPSHOT_CHUNK):
+        r = _get("snapshots", f"{DATA_BASE}/v2/stocks/snapshots", {"symbols": ",".join(chunk)}, timeout=20)
+        for s, snap in (r.json() or {}).items():
+            bar = (snap or {}).get("dailyBar") or (snap or {}).get("prevDailyBar")
+            if bar: out[s] = (float(bar["c"]), float(bar["v"]))
+    return out
 def is_open_now(now=None):
     now = now or dt.datetime.utcnow()
     if now.weekday() >= 5: return False
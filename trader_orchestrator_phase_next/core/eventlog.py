@@ -0,0 +1,66 @@
+import os, json, time, queue, atexit, threading
+class EventLog:
+    # JSON-lines event log. write() only enqueues; a background thread appends in batches and rotates the
+    # file by size or age (events.log -> events.log.1 ... .N). tail() seeks backwards from the end of the
+    # newest file(s), so its cost follows the number of lines asked for, not the size of the history.
+    def __init__(self, path, max_bytes=10*1024*1024, backups=5, rotate_sec=86400, flush_sec=0.5):
+        self.path = path; self.max_bytes = max_bytes; self.backups = backups; self.rotate_sec = rotate_sec
+        self.flush_sec = flush_sec; self.q = queue.Queue(); self.lock = threading.Lock()
+        self.opened = os.path.getmtime(path) if os.path.exists(path) else time.time()
+        self.thread = threading.Thread(target=self._run, daemon=True); self.thread.start()
+        atexit.register(self.flush)
+    def write(self, line):
+        self.q.put(line)
+    def flush(self):
+        self.q.join()
+    def _run(self):
+        while True:
+            batch = [self.q.get()]
+            deadline = time.time() + self.flush_sec
+            while len(batch) < 1000:
+                try: batch.append(self.q.get(timeout=max(0.0, deadline - time.time())))
+                except queue.Empty: break
+            try:
+                with self.lock:
+                    if self._due(): self._rotate()
+                    with open(self.path, "a") as f: f.write("".join(l+"\n" for l in batch))
+            except OSError: pass
+            finally:
+                for _ in batch: self.q.task_done()
+    def _due(self):
+        try: size = os.path.getsize(self.path)
+        except OSError: return False
+        return size >= self.max_bytes or (size and time.time() - self.opened >= self.rotate_sec)
+    def _rotate(self):
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"): os.replace(f"{self.path}.{i}", f"{self.path}.{i+1}")
+        if self.backups: os.replace(self.path, f"{self.path}.1")
+        else: os.remove(self.path)
+        self.opened = time.time()
+    def _reverse_lines(self, path, block=65536):
+        try: f = open(path, "rb")
+        except OSError: return
+        with f:
+            f.seek(0, os.SEEK_END); pos = f.tell(); rest = b""
+            while pos > 0:
+                step = min(block, pos); pos -= step; f.seek(pos)
+                parts = (f.read(step) + rest).split(b"\n"); rest = parts[0]
+                for line in reversed(parts[1:]):
+                    if line: yield line.decode("utf-8", "replace")
+            if rest: yield rest.decode("utf-8", "replace")
+    def tail(self, n=30, level=None, event=None, symbol=None):
+        # newest n matching lines, oldest first
+        out = []
+        if n <= 0: return out
+        with self.lock:
+            for p in [self.path] + [f"{self.path}.{i}" for i in range(1, self.backups + 1)]:
+                for line in self._reverse_lines(p):
+                    if level or event or symbol:
+                        try: rec = json.loads(line)
+                        except ValueError: continue
+                        if level and rec.get("level") != level: continue
+                        if event and rec.get("event") != event: continue
+                        if symbol and (rec.get("details") or {}).get("symbol") != symbol: continue
+                    out.append(line)
+                    if len(out) >= n: return out[::-1]
+        return out[::-1]
@@ -0,0 +1,175 @@
+import math, numpy as np, pandas as pd
+from collections import deque
+from core import data_hub as DH
+from core.bar_store import to_array
+FEATURES = ["ret1","ret5","vol","rsi","macd","macd_sig","macd_hist"]
+A12, A26, A9 = 2/13, 2/27, 2/10   # ewm(span=12/26/9, adjust=False)
+VOL_N, RSI_N, MIN_BARS = 20, 14, 60
+# FeatureState.pack layout: scalars, then each window as (length, values padded to maxlen), then (has_row, row)
+SCALARS = ("ts","bars","valid","ema12","ema26","sig","rsum","rsq","gsum","lsum","lnz")
+WINDOWS = (("closes", 6), ("rets", VOL_N), ("gains", RSI_N), ("losses", RSI_N))
+ROW = ("open","high","low","close","volume", *FEATURES)
+WIDTH = len(SCALARS) + sum(1+m for _, m in WINDOWS) + 1 + len(ROW)
+class FeatureView:
+    # stands in for the add_features frame handed to generate_signal: len() and .iloc[-1] are all they read
+    def __init__(self, row, n):
+        self.row = row; self.n = n
+    def __len__(self): return self.n
+    @property
+    def iloc(self): return self
+    def __getitem__(self, i):
+        if self.n and i in (-1, self.n-1): return self.row
+        raise IndexError(i)
+class FeatureState:
+    # running EMA state plus fixed-size windows; one update per bar is O(1)
+    def __init__(self):
+        self.ts = None; self.bars = 0; self.valid = 0; self.row = None; self.prev = None
+        self.closes = deque(maxlen=6); self.ema12 = self.ema26 = self.sig = 0.0
+        self.rets = deque(maxlen=VOL_N); self.rsum = self.rsq = 0.0
+        self.gains = deque(maxlen=RSI_N); self.losses = deque(maxlen=RSI_N); self.gsum = self.lsum = 0.0; self.lnz = 0
+    def copy(self):
+        c = FeatureState.__new__(FeatureState); c.__dict__.update(self.__dict__)
+        c.closes = deque(self.closes, maxlen=6); c.rets = deque(self.rets, maxlen=VOL_N)
+        c.gains = deque(self.gains, maxlen=RSI_N); c.losses = deque(self.losses, maxlen=RSI_N); c.prev = None
+        return c
+    def push(self, ts, o, h, l, c, v):
+        prev_c = self.closes[-1] if self.closes else None
+        self.closes.append(c); self.bars += 1; self.ts = ts
+        if prev_c is None:
+            self.ema12 = self.ema26 = c; self.sig = 0.0; return
+        self.ema12 += A12*(c-self.ema12); self.ema26 += A26*(c-self.ema26)
+        macd = self.ema12 - self.ema26; self.sig += A9*(macd-self.sig)
+        ret1 = c/prev_c - 1 if prev_c else math.nan
+        if len(self.rets) == VOL_N:
+            old = self.rets[0]; self.rsum -= old; self.rsq -= old*old
+        self.rets.append(ret1); self.rsum += ret1; self.rsq += ret1*ret1
+        d = c - prev_c; gain = d if d > 0 else 0.0; loss = -d if d < 0 else 0.0
+        if len(self.gains) == RSI_N:
+            og = self.gains[0]; ol = self.losses[0]; self.gsum -= og; self.lsum -= ol; self.lnz -= ol > 0
+        self.gains.append(gain); self.losses.append(loss); self.gsum += gain; self.lsum += loss; self.lnz += loss > 0
+        if len(self.rets) < VOL_N or len(self.gains) < RSI_N or len(self.closes) < 6: return
+        if self.lnz == 0: return   # add_features turns a zero average loss into NaN rsi and drops the row
+        var = max(0.0, (self.rsq - self.rsum*self.rsum/VOL_N) / (VOL_N-1))
+        rs = (self.gsum/RSI_N) / (self.lsum/RSI_N)
+        row = {"open":o,"high":h,"low":l,"close":c,"volume":v,"ret1":ret1,"ret5":c/self.closes[0]-1,
+               "vol":math.sqrt(var),"macd":macd,"macd_sig":self.sig,"macd_hist":macd-self.sig,"rsi":100-(100/(1+rs))}
+        if not all(map(math.isfinite, (row[k] for k in FEATURES))): return
+        self.row = row; self.valid += 1
+    def pack(self):
+        # one float64 row (WIDTH) holding the whole state except prev; exact, so a restored state continues bit for bit
+        a = np.full(WIDTH, np.nan); a[:len(SCALARS)] = [math.nan if getattr(self, k) is None else getattr(self, k) for k in SCALARS]; p = len(SCALARS)
+        for k, m in WINDOWS:
+            w = getattr(self, k); a[p] = len(w); a[p+1:p+1+len(w)] = w; p += 1+m
+        if self.row: a[p] = 1; a[p+1:] = [self.row[k] for k in ROW]
+        else: a[p] = 0
+        return a
+    @classmethod
+    def unpack(cls, a):
+        st = cls(); v = a.tolist()
+        for k, x in zip(SCALARS, v): setattr(st, k, x)
+        st.ts = None if math.isnan(st.ts) else st.ts; st.bars, st.valid, st.lnz = int(st.bars), int(st.valid), int(st.lnz); p = len(SCALARS)
+        for k, m in WINDOWS:
+            setattr(st, k, deque(v[p+1:p+1+int(v[p])], maxlen=m)); p += 1+m
+        st.row = dict(zip(ROW, v[p+1:])) if v[p] else None
+        return st
+    def view(self):
+        return FeatureView(self.row, self.valid if self.bars >= MIN_BARS and self.row else 0)
+def _columns(bars):
+    # (epoch seconds, [open, high, low, close, volume]) of a bar frame or a ringstore.RingView, without copying the latter
+    if isinstance(bars, pd.DataFrame): return to_array(bars)[0], [bars[c].to_numpy() for c in ("open","high","low","close","volume")]
+    return bars.t, [bars.open, bars.high, bars.low, bars.close, bars.volume]
+class FeatureEngine:
+    # per-(symbol, timeframe) replacement for add_features that only consumes bars it hasn't seen
+    def __init__(self):
+        self.states = {}
+    def update(self, symbol, timeframe, bars):
+        if bars is None or not len(bars): return None
+        key = (symbol, timeframe); st = self.states.get(key); ts, cols = _columns(bars)
+        if st is None or st.ts is None or st.ts < ts[0]: st = FeatureState(); i = 0
+        else:
+            i = int(np.searchsorted(ts, st.ts))
+            if i < len(ts) and ts[i] == st.ts:
+                if st.prev is None: i += 1   # no snapshot to undo the last bar with; keep it as is
+                else: st = st.prev   # last bar was re-fetched (possibly still forming): undo and re-apply
+        for j in range(i, len(ts)):
+            if j == len(ts)-1: st.prev = st.copy()
+            st.push(float(ts[j]), *(float(a[j]) for a in cols))
+        self.states[key] = st
+        return st.view()
+    def export(self):
+        # -> (keys, states, prevs): packed (N, WIDTH) arrays, a prev row of NaNs where there is no snapshot
+        keys = list(self.states); S = np.empty((len(keys), WIDTH)); P = np.full((len(keys), WIDTH), np.nan)
+        for j, k in enumerate(keys):
+            st = self.states[k]; S[j] = st.pack()
+            if st.prev is not None: P[j] = st.prev.pack()
+        return [list(k) for k in keys], S, P
+    def restore(self, keys, S, P, keep=None):
+        # inverse of export; keep(symbol) filters which symbols are taken. -> number of states restored
+        n = 0
+        for (sym, tf), s, p in zip(keys, S, P):
+            if keep and not keep(sym): continue
+            st = FeatureState.unpack(s); st.prev = None if math.isnan(p[1]) else FeatureState.unpack(p)   # p[1]: bars, never NaN in a packed state
+            self.states[(sym, tf)] = st; n += 1
+        return n
+def _ema(x, a):
+    out = np.empty_like(x); e = np.full(x.shape[1], np.nan)
+    for t in range(x.shape[0]):
+        e = np.where(np.isnan(e), x[t], e + a*(x[t]-e)); out[t] = e
+    return out
+def _rolling_sum(x, w):
+    # trailing w-row sums per column; NaN unless the whole window is present (rolling(w) semantics)
+    out = np.full_like(x, np.nan)
+    if x.shape[0] < w: return out
+    nan = np.isnan(x); cs = np.cumsum(np.where(nan, 0.0, x), axis=0); nn = np.cumsum(nan, axis=0)
+    s = cs[w-1:].copy(); s[1:] -= cs[:-w]; k = nn[w-1:].copy(); k[1:] -= nn[:-w]
+    out[w-1:] = np.where(k == 0, s, np.nan)
+    return out
+def panel_features(frames):
+    # add_features for a whole timeframe at once: closes are stacked into a (time x symbol) panel,
+    # each column holding that symbol's own bars aligned on the most recent one, and every feature
+    # is computed column-wise in one pass
+    syms = [s for s, df in frames.items() if df is not None and not df.empty]
+    if not syms: return {}
+    T = max(len(frames[s]) for s in syms); N = len(syms)
+    P = np.full((T, N), np.nan)
+    for j, s in enumerate(syms):
+        c = frames[s]["close"].to_numpy(dtype=np.float64); P[T-len(c):, j] = c
+    ret1 = np.full_like(P, np.nan); ret1[1:] = P[1:]/P[:-1] - 1
+    ret5 = np.full_like(P, np.nan); ret5[5:] = P[5:]/P[:-5] - 1
+    s1 = _rolling_sum(ret1, VOL_N); s2 = _rolling_sum(ret1*ret1, VOL_N)
+    vol = np.sqrt(np.maximum(0.0, (s2 - s1*s1/VOL_N) / (VOL_N-1)))
+    macd = _ema(P, A12) - _ema(P, A26); sig = _ema(macd, A9)
+    delta = np.full_like(P, np.nan); delta[1:] = P[1:] - P[:-1]
+    gain = _rolling_sum(np.where(delta > 0, delta, np.where(np.isnan(delta), np.nan, 0.0)), RSI_N)
+    loss = _rolling_sum(np.where(delta < 0, -delta, np.where(np.isnan(delta), np.nan, 0.0)), RSI_N)
+    lnz = _rolling_sum(np.where(np.isnan(delta), np.nan, (delta < 0).astype(np.float64)), RSI_N)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = np.where(lnz > 0, 100 - 100/(1 + gain/loss), np.nan)
+    F = {"ret1":ret1,"ret5":ret5,"vol":vol,"rsi":rsi,"macd":macd,"macd_sig":sig,"macd_hist":macd-sig}
+    ok = np.ones_like(P, dtype=bool)
+    for a in F.values(): ok &= np.isfinite(a)
+    counts = ok.sum(axis=0); last = T - 1 - np.argmax(ok[::-1], axis=0)
+    out = {}
+    for j, s in enumerate(syms):
+        df = frames[s]
+        if len(df) < MIN_BARS or not counts[j]: out[s] = FeatureView(None, 0); continue
+        r = int(last[j]); bar = df.iloc[r-(T-len(df))]
+        row = {k: float(bar[k]) for k in ("open","high","low","close","volume")}
+        row.update({k: float(a[r, j]) for k, a in F.items()})
+        out[s] = FeatureView(row, int(counts[j]))
+    return out
+def featurize(frames, timeframe, mode="incremental", engine=None, on_error=None):
+    # {symbol: features} for one timeframe in the configured mode ("incremental" needs the engine);
+    # on_error(symbol, exc) gets each failure, with symbol None when the whole panel failed
+    out = {}
+    if mode != "incremental": frames = {s: df if isinstance(df, pd.DataFrame) else df.frame() for s, df in frames.items()}
+    if mode == "panel":
+        try: return panel_features(frames)
+        except Exception as e:
+            if on_error: on_error(None, e)
+            return out
+    for sym, df in frames.items():
+        try: out[sym] = engine.update(sym, timeframe, df) if mode == "incremental" else DH.add_features(df)
+        except Exception as e:
+            if on_error: on_error(sym, e)
+    return out
@@ -0,0 +1,60 @@
+import time, threading
+from contextlib import contextmanager
+class Histogram:
+    # last `size` samples in a ring (for p50/p95/p99) plus lifetime count, sum and errors
+    def __init__(self, size=1024):
+        self.buf = [0.0]*size; self.i = 0; self.count = 0; self.sum = 0.0; self.errors = 0
+    def observe(self, v, error=False):
+        self.buf[self.i] = v; self.i = (self.i + 1) % len(self.buf)
+        self.count += 1; self.sum += v; self.errors += bool(error)
+    def quantiles(self, qs=(0.5, 0.95, 0.99)):
+        data = sorted(self.buf[:min(self.count, len(self.buf))])
+        if not data: return {q: 0.0 for q in qs}
+        return {q: data[min(len(data)-1, int(q*len(data)))] for q in qs}
+class Registry:
+    # Timing spans keyed by name + labels. Recording is a perf_counter pair and a list write under a lock;
+    # percentiles are only computed when /metrics is scraped. Spans recorded between begin_tick() and
+    # end_tick() (from any thread) are also summed into a per-stage breakdown of that tick.
+    def __init__(self, prefix="orch"):
+        self.prefix = prefix; self.hists = {}; self.lock = threading.Lock()
+        self.tick = None; self.last_tick = {}
+    def observe(self, name, seconds, error=False, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            h = self.hists.get(key)
+            if h is None: h = self.hists[key] = Histogram()
+            h.observe(seconds, error)
+            if self.tick is not None:
+                stage = "/".join([name, *map(str, labels.values())])
+                self.tick[stage] = self.tick.get(stage, 0.0) + seconds
+    @contextmanager
+    def span(self, name, **labels):
+        t = time.perf_counter(); err = False
+        try: yield
+        except BaseException:
+            err = True; raise
+        finally: self.observe(name, time.perf_counter() - t, err, **labels)
+    def begin_tick(self):
+        with self.lock: self.tick = {}
+    def end_tick(self):
+        with self.lock:
+            if self.tick is not None: self.last_tick = {k: round(v*1000, 2) for k, v in self.tick.items()}
+            self.tick = None
+    def render(self):
+        # Prometheus text exposition: per span name a summary family, then its error counter family; every
+        # line of a family is contiguous, as strict parsers (promtool, OpenMetrics) require
+        with self.lock: items = [(k, h, h.quantiles()) for k, h in sorted(self.hists.items())]
+        by_name = {}
+        for (name, labels), h, qs in items: by_name.setdefault(name, []).append((",".join(f'{k}="{v}"' for k, v in labels), h, qs))
+        out = []
+        for name, series in by_name.items():
+            metric = f"{self.prefix}_{name}_seconds"; errors = f"{self.prefix}_{name}_errors_total"
+            out.append(f"# TYPE {metric} summary")
+            for lab, h, qs in series:
+                for q, v in qs.items(): out.append(f'{metric}{{{lab}{"," if lab else ""}quantile="{q}"}} {v:.6f}')
+                sel = f"{{{lab}}}" if lab else ""
+                out.append(f"{metric}_sum{sel} {h.sum:.6f}"); out.append(f"{metric}_count{sel} {h.count}")
+            out.append(f"# TYPE {errors} counter")
+            for lab, h, _ in series: out.append(f"{errors}{{{lab}}} {h.errors}" if lab else f"{errors} {h.errors}")
+        return "\n".join(out) + "\n"
+METRICS = Registry()
@@ -1,40 +1,123 @@
-import os, requests
+import os, time, uuid, random, threading, requests
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from core.metrics import METRICS
 load_dotenv()
 ALPACA_KEY = os.getenv("ALPACA_KEY_ID","")
 ALPACA_SECRET = os.getenv("ALPACA_SECRET_KEY","")
 ALPACA_PAPER_BASE = os.getenv("ALPACA_PAPER_BASE","https://paper-api.alpaca.markets")
 ALPACA_LIVE_BASE  = os.getenv("ALPACA_LIVE_BASE","https://api.alpaca.markets")
 ALERT_WEBHOOK = os.getenv("ALERT_WEBHOOK","")
+RATE_PER_MIN = float(os.getenv("ALPACA_RATE_PER_MIN","200"))   # trading API budget, shared by every broker call
+RATE_BURST = 10
+RETRIES, BACKOFF, BACKOFF_CAP = 4, 0.5, 8.0
+RETRY_STATUS = {429, 500, 502, 503, 504}
+SESSION = requests.Session()
+SESSION.mount("https://", requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=16))
+SESSION.mount("http://", requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=16))
 def headers():
     return {"APCA-API-KEY-ID": ALPACA_KEY, "APCA-API-SECRET-KEY": ALPACA_SECRET}
 def base(paper=True):
     return ALPACA_PAPER_BASE if paper else ALPACA_LIVE_BASE
+class TokenBucket:
+    # refills per_min/60 tokens a second up to `burst`; take() blocks until a token is free
+    def __init__(self, per_min, burst):
+        self.rate = per_min/60.0; self.burst = burst; self.tokens = float(burst); self.t = time.monotonic(); self.lock = threading.Lock()
+    def take(self):
+        while True:
+            with self.lock:
+                now = time.monotonic(); self.tokens = min(self.burst, self.tokens + (now - self.t)*self.rate); self.t = now
+                if self.tokens >= 1: self.tokens -= 1; return
+                wait = (1 - self.tokens)/self.rate
+            time.sleep(wait)
+BUCKET = TokenBucket(RATE_PER_MIN, RATE_BURST)
+LEGS = ThreadPoolExecutor(max_workers=8, thread_name_prefix="legs")
+def _backoff(attempt, r=None):
+    # Retry-After when the broker sends one, else capped exponential with +-50% jitter
+    after = r.headers.get("Retry-After") if r is not None else None
+    if after:
+        try: return min(BACKOFF_CAP, float(after))
+        except ValueError: pass
+    return min(BACKOFF_CAP, BACKOFF * 2**attempt) * random.uniform(0.5, 1.5)
+def _send(method, endpoint, url, **kw):
+    BUCKET.take()
+    with METRICS.span("http_request", api="broker", endpoint=endpoint):
+        return SESSION.request(method, url, headers=headers(), **kw)
+def _call(method, endpoint, url, **kw):
+    # idempotent requests only: retried on 429/5xx and connection errors
+    for attempt in range(RETRIES+1):
+        try: r = _send(method, endpoint, url, **kw)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == RETRIES: raise
+            time.sleep(_backoff(attempt)); continue
+        if r.status_code in RETRY_STATUS and attempt < RETRIES: time.sleep(_backoff(attempt, r)); continue
+        r.raise_for_status(); return r
 def account(paper=True):
-    r = requests.get(f"{base(paper)}/v2/account", headers=headers(), timeout=15)
-    r.raise_for_status(); return r.json()
+    r = _call("GET", "account", f"{base(paper)}/v2/account", timeout=15)
+    return r.json()
 def positions(paper=True):
-    r = requests.get(f"{base(paper)}/v2/positions", headers=headers(), timeout=15)
-    r.raise_for_status(); return r.json()
-def submit_bracket(symbol, qty, side, tp_price, sl_price, paper=True):
+    r = _call("GET", "positions", f"{base(paper)}/v2/positions", timeout=15)
+    return r.json()
+def order_by_client_id(client_order_id, paper=True):
+    try: return _call("GET", "order_by_client_id", f"{base(paper)}/v2/orders:by_client_order_id", params={"client_order_id": client_order_id}, timeout=15).json()
+    except requests.HTTPError as e:
+        if e.response is not None and e.response.status_code == 404: return None
+        raise
+def submit_order(data, paper=True):
+    # Orders carry a client_order_id, so a 429/5xx or a lost response can be retried without a double fill:
+    # each resubmit first asks the broker for that id, and the broker rejects a duplicate id anyway.
+    data = {**data, "client_order_id": data.get("client_order_id") or uuid.uuid4().hex}
+    url = f"{base(paper)}/v2/orders"; cid = data["client_order_id"]; r = err = None
+    for attempt in range(RETRIES+1):
+        if attempt:
+            time.sleep(_backoff(attempt-1, r))
+            try:
+                found = order_by_client_id(cid, paper)
+                if found: return found
+            except Exception: pass
+        try: r = _send("POST", "orders", url, json=data, timeout=20)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            r = None; err = e; continue
+        if r.status_code < 300: return r.json()
+        if r.status_code == 422 and attempt and "client_order_id" in r.text:
+            found = order_by_client_id(cid, paper)
+            if found: return found
+        if r.status_code not in RETRY_STATUS: raise RuntimeError(r.text)
+        err = RuntimeError(r.text)
+    raise err
+def submit_bracket(symbol, qty, side, tp_price, sl_price, paper=True, client_order_id=None):
     data = {"symbol":symbol,"qty":str(qty),"side":side,"type":"market","time_in_force":"day",
             "order_class":"bracket","take_profit":{"limit_price": round(tp_price, 2)},
-            "stop_loss":{"stop_price": round(sl_price, 2)}}
-    r = requests.post(f"{base(paper)}/v2/orders", headers=headers(), json=data, timeout=20)
-    if r.status_code >= 300: raise RuntimeError(r.text)
-    return r.json()
-def submit_split_brackets(symbol, qty, side, tp1, sl1, tp2, sl2, paper=True):
+            "stop_loss":{"stop_price": round(sl_price, 2)}, "client_order_id": client_order_id}
+    return submit_order(data, paper)
+def split_qty(qty):
     q1 = max(1, int(qty*0.5)); q2 = max(1, qty - q1)
-    o1 = submit_bracket(symbol, q1, side, tp1, sl1, paper)
-    o2 = submit_bracket(symbol, q2, side, tp2, sl2, paper)
-    return [o1,o2]
+    return q1, q2
+class LegFailed(RuntimeError):
+    # one bracket leg failed after the other reached the broker; .placed holds the orders that are live
+    def __init__(self, err, placed):
+        super().__init__(f"leg failed: {err} (placed {[o.get('client_order_id') for o in placed]})"); self.placed = placed
+def submit_split_brackets(symbol, qty, side, tp1, sl1, tp2, sl2, paper=True):
+    # both legs go out at once; ids share a prefix so the pair is easy to find at the broker
+    q1, q2 = split_qty(qty); tag = f"{symbol}-{uuid.uuid4().hex[:12]}"
+    futs = [LEGS.submit(submit_bracket, symbol, q1, side, tp1, sl1, paper, f"{tag}-1"),
+            LEGS.submit(submit_bracket, symbol, q2, side, tp2, sl2, paper, f"{tag}-2")]
+    out, errs = [], []
+    for f in futs:
+        try: out.append(f.result())
+        except Exception as e: errs.append(e)
+    if errs and out: raise LegFailed(errs[0], out)
+    if errs: raise errs[0]
+    return out
 def cancel_all(paper=True):
-    try: requests.delete(f"{base(paper)}/v2/orders", headers=headers(), timeout=20)
+    try: _call("DELETE", "cancel_all", f"{base(paper)}/v2/orders", timeout=20)
     except Exception: pass
 def close_all(paper=True):
-    try: requests.delete(f"{base(paper)}/v2/positions", headers=headers(), timeout=20)
+    try: _call("DELETE", "close_all", f"{base(paper)}/v2/positions", timeout=20)
     except Exception: pass
 def alert(event, payload):
     if not ALERT_WEBHOOK: return
-    try: requests.post(ALERT_WEBHOOK, json={"event":event,"payload":payload}, timeout=10)
+    try:
+        with METRICS.span("http_request", api="webhook", endpoint="alert"):
+            SESSION.post(ALERT_WEBHOOK, json={"event":event,"payload":payload}, timeout=10)
     except Exception: pass
@@ -0,0 +1,37 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+class IOPool:
+    # Bounded thread pool for the blocking HTTP work of a tick. Each call is tagged with a host
+    # ("data", "broker", ...) whose semaphore caps how many run at once; max_workers=0 runs inline.
+    def __init__(self, max_workers=16, per_host=None, timeout=30):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="io") if max_workers else None
+        self.limits = {h: threading.BoundedSemaphore(n) for h, n in (per_host or {}).items()}
+        self.timeout = timeout
+    @classmethod
+    def from_config(cls, cfg):
+        p = cfg.get("pipeline", {})
+        workers = p.get("max_workers", 16) if p.get("mode", "concurrent") == "concurrent" else 0
+        return cls(workers, p.get("per_host"), p.get("timeout_sec", 30))
+    def _guarded(self, host, fn, args):
+        sem = self.limits.get(host)
+        if sem is None: return fn(*args)
+        with sem: return fn(*args)
+    def submit(self, host, fn, *args):
+        return self.pool.submit(self._guarded, host, fn, args)
+    def run_all(self, calls, timeout=None, deadline=True):
+        # calls: {key: (host, fn, args)} -> {key: (result, error)}; keys keep their insertion order.
+        # A call past the deadline is reported as a TimeoutError but keeps running in its thread (a running
+        # future can't be cancelled), so whatever it writes needs its own lock. deadline=False waits for every
+        # call: for work whose outcome must be known, like order submission.
+        out = {}
+        if self.pool is None:
+            for k, (host, fn, args) in calls.items():
+                try: out[k] = (fn(*args), None)
+                except Exception as e: out[k] = (None, e)
+            return out
+        futs = {k: self.submit(host, fn, *args) for k, (host, fn, args) in calls.items()}
+        done, _ = wait(futs.values(), timeout=(timeout or self.timeout) if deadline else None)
+        for k, f in futs.items():
+            if f not in done: f.cancel(); out[k] = (None, TimeoutError(f"{k} timed out (still running)")); continue
+            e = f.exception(); out[k] = (None, e) if e else (f.result(), None)
+        return out
@@ -0,0 +1,35 @@
+import time
+from core import order_router as OR
+from core.risk import sector_of
+class PortfolioSnapshot:
+    # Account and positions fetched once per tick. Orders submitted during the tick are applied locally
+    # as pending positions so later signals see the new exposure; pending entries ride along to the next
+    # snapshot until the broker reports the position or pending_ttl runs out.
+    def __init__(self, account, positions, pending=None, pending_ttl=600, errors=None):
+        self.account = account; self.errors = errors or {}
+        self.equity = float(account.get("equity", 0)) if account else None
+        self.last_equity = float(account.get("last_equity", self.equity)) if account else None
+        self.positions = list(positions or [])
+        held = {p.get("symbol") for p in self.positions}; now = time.time()
+        self.pending = {s: o for s, o in (pending or {}).items() if s not in held and now - o["ts"] < pending_ttl}
+        self.sector_counts = {}
+        for p in self.positions: self._count(p.get("symbol",""), 1)
+        for s in self.pending: self._count(s, 1)
+    @staticmethod
+    def calls(paper=True):
+        # IOPool.run_all entries; feed the results to from_results
+        return {"account": ("broker", OR.account, (paper,)), "positions": ("broker", OR.positions, (paper,))}
+    @classmethod
+    def from_results(cls, res, pending=None, pending_ttl=600):
+        return cls(res["account"][0], res["positions"][0], pending, pending_ttl,
+                   {k: e for k in ("account","positions") for e in [res[k][1]] if e})
+    def _count(self, symbol, n):
+        sec = sector_of(symbol); self.sector_counts[sec] = self.sector_counts.get(sec,0)+n
+    @property
+    def open_positions(self):
+        return self.positions + [{"symbol": s, "side": o["side"], "pending": True} for s, o in self.pending.items()]
+    def apply(self, symbol, side, strategy):
+        if symbol in self.pending: return
+        self.pending[symbol] = {"side": side, "strategy": strategy, "ts": time.time()}; self._count(symbol, 1)
+    def discard(self, symbol):
+        if self.pending.pop(symbol, None) is not None: self._count(symbol, -1)
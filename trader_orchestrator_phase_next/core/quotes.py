@@ -0,0 +1,29 @@
+import time, pandas as pd
+TF_SECONDS = {"1Min":60,"2Min":120,"5Min":300,"15Min":900,"1Hour":3600,"1Day":86400}
+def _epoch(ts):
+    return pd.Timestamp(ts).timestamp()
+class PriceService:
+    # Latest price per symbol with its age. Trades from the market stream land here as they print; bars
+    # the tick already fetched are recorded as a fallback source. last() refuses anything older than max_age.
+    def __init__(self, stream=None, max_age=90):
+        self.max_age = max_age; self.prices = {}   # symbol -> (price, epoch seconds, source)
+        if stream is not None: stream.on("t", self._on_trade)
+    def _on_trade(self, m):
+        self.record(m["S"], float(m["p"]), _epoch(m["t"]), "stream")
+    def record(self, symbol, price, ts, source):
+        cur = self.prices.get(symbol)
+        if cur is None or ts >= cur[1]: self.prices[symbol] = (price, ts, source)
+    def observe_bars(self, timeframe, frames, fetched_at=None):
+        # a bar's close is the last trade up to the bar's end (or up to the fetch, while it is still forming)
+        fetched_at = fetched_at or time.time(); span = TF_SECONDS.get(timeframe, 60)
+        for sym, df in frames.items():
+            if df is None or not len(df): continue
+            if isinstance(df, pd.DataFrame): px, ts = float(df["close"].iloc[-1]), df.index[-1].timestamp()
+            else: px, ts = float(df.close[-1]), float(df.t[-1])   # ringstore.RingView
+            self.record(sym, px, min(ts + span, fetched_at), "bars")
+    def last(self, symbol, max_age=None, now=None):
+        cur = self.prices.get(symbol)
+        if cur is None: return None, None, None
+        px, ts, src = cur; age = max(0.0, (now or time.time()) - ts)
+        if age > (self.max_age if max_age is None else max_age): return None, age, src
+        return px, age, src
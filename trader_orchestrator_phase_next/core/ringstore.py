@@ -0,0 +1,145 @@
+import time, threading, numpy as np, pandas as pd
+from core import data_hub as DH
+from core.bar_store import to_array, from_array, delta_groups
+# In-memory working set of bars: per timeframe one preallocated block with a fixed-capacity ring per
+# symbol slot, t as float64 epoch seconds and OHLCV in the configured dtype (float64 keeps features exactly
+# at add_features parity; float32 halves the block but RSI/ATR then drift ~1e-3 from it). Every bar is written twice,
+# at p and p+capacity of a double-length row, so the newest `capacity` bars are always one contiguous
+# slice: views handed to the feature stage and strategies are numpy slices, never copies. Fetches merge
+# into the rings in place (a bar with the last timestamp replaces it), so a warm tick allocates only its
+# delta. The disk BarStore seeds a symbol's first use and gets dirty slots written back every flush_sec.
+class RingView:
+    # zero-copy window over one slot; .frame() is the (copying) DataFrame form for the panel/frame modes
+    __slots__ = ("t", "open", "high", "low", "close", "volume")
+    def __init__(self, t, x):
+        self.t = t; self.open, self.high, self.low, self.close, self.volume = x
+    def __len__(self): return len(self.t)
+    def frame(self):
+        return from_array(np.vstack([self.t, np.vstack([self.open, self.high, self.low, self.close, self.volume]).astype(np.float64)]))
+class _Block:
+    def __init__(self, capacity, dtype, slots):
+        self.cap = capacity; self.dtype = dtype; self.slots = {}
+        self.t = np.zeros((slots, 2*capacity)); self.x = np.zeros((slots, 5, 2*capacity), dtype=dtype)
+        self.head = np.zeros(slots, dtype=np.int64); self.n = np.zeros(slots, dtype=np.int64); self.dirty = set()
+    def slot(self, symbol):
+        i = self.slots.get(symbol)
+        if i is not None: return i
+        i = len(self.slots)
+        if i == len(self.head):   # out of slots: double every array once
+            k = len(self.head)
+            self.t = np.concatenate([self.t, np.zeros_like(self.t)]); self.x = np.concatenate([self.x, np.zeros_like(self.x)])
+            self.head = np.concatenate([self.head, np.zeros(k, dtype=np.int64)]); self.n = np.concatenate([self.n, np.zeros(k, dtype=np.int64)])
+        self.slots[symbol] = i
+        return i
+    def view(self, i, since=None, limit=None):
+        h = int(self.head[i]); n = int(self.n[i]); a, b = h - n + self.cap, h + self.cap
+        if since is not None: a += int(np.searchsorted(self.t[i, a:b], since, "left"))
+        if limit: a = max(a, b - limit)
+        return RingView(self.t[i, a:b], self.x[i, :, a:b])
+    def last_ts(self, i):
+        return float(self.t[i, int(self.head[i]) - 1 + self.cap]) if self.n[i] else None
+    def write(self, i, arr, reset=False):
+        # arr: (6, k) store layout, sorted by time
+        if reset: self.head[i] = 0; self.n[i] = 0
+        last = self.last_ts(i)
+        if last is not None:
+            arr = arr[:, arr[0] >= last]
+            if arr.shape[1] and arr[0, 0] == last:   # re-fetched (possibly still forming) last bar
+                p = (int(self.head[i]) - 1) % self.cap
+                for q in (p, p + self.cap): self.t[i, q] = arr[0, 0]; self.x[i, :, q] = arr[1:, 0]
+                arr = arr[:, 1:]
+        k = arr.shape[1]
+        if k:
+            if k > self.cap: arr = arr[:, -self.cap:]; k = self.cap
+            p = (int(self.head[i]) + np.arange(k)) % self.cap
+            for q in (p, p + self.cap): self.t[i, q] = arr[0]; self.x[i][:, q] = arr[1:]
+            self.head[i] = (int(self.head[i]) + k) % self.cap; self.n[i] = min(self.cap, int(self.n[i]) + k)
+        self.dirty.add(i)
+    def nbytes(self):
+        return self.t.nbytes + self.x.nbytes + self.head.nbytes + self.n.nbytes
+class RingStore:
+    def __init__(self, disk=None, capacity=1000, dtype="float64", slots=256, flush_sec=900):
+        self.disk = disk; self.capacity = capacity; self.dtype = np.dtype(dtype); self.slots = slots
+        self.flush_sec = flush_sec; self.blocks = {}; self.lock = threading.Lock(); self.flushed = {}
+    @classmethod
+    def from_config(cls, cfg, disk=None):
+        s = cfg.get("store", {})
+        return cls(disk, s.get("capacity", 1000), s.get("dtype", "float64"), s.get("slots", 256), s.get("flush_sec", 900))
+    def _block(self, timeframe):
+        b = self.blocks.get(timeframe)
+        if b is None:
+            with self.lock:
+                b = self.blocks.setdefault(timeframe, _Block(self.capacity, self.dtype, self.slots)); self.flushed.setdefault(timeframe, time.time())
+        return b
+    def _slot(self, b, symbol, timeframe):
+        i = b.slots.get(symbol)
+        if i is None:
+            i = b.slot(symbol)
+            if self.disk is not None:
+                df = self.disk.load(symbol, timeframe)
+                if not df.empty: b.write(i, to_array(df)); b.dirty.discard(i)
+        return i
+    def view(self, symbol, timeframe, since=None, limit=None):
+        b = self._block(timeframe); return b.view(self._slot(b, symbol, timeframe), since, limit)
+    def append(self, symbol, timeframe, bars, limit=1000):
+        # stream bars (a frame); same merge rule (empty view when nothing was newer, None for a symbol without
+        # history) as BarStore.append
+        b = self._block(timeframe); i = self._slot(b, symbol, timeframe)
+        if not b.n[i]: return None
+        bars = bars[~bars.index.duplicated(keep="last")].sort_index(); arr = to_array(bars)
+        if not (arr[0] >= b.last_ts(i)).any(): return b.view(i, since=np.inf)
+        b.write(i, arr)
+        return b.view(i, limit=limit)
+    def refresh(self, symbols, timeframe, start, end, limit=1000):
+        # BarStore.refresh over the rings: full fetch for empty/stale slots, one delta request for the rest
+        b = self._block(timeframe); since = pd.Timestamp(start).timestamp(); cold, warm = [], {}
+        for s in dict.fromkeys(symbols):
+            i = self._slot(b, s, timeframe); last = b.last_ts(i)
+            if last is None or last < since: cold.append(s)
+            else: warm[s] = last
+        for s, df in (DH.bars_multi(cold, start, end, timeframe, limit) if cold else {}).items():
+            if not df.empty: b.write(b.slots[s], to_array(df), reset=True)
+        for t0, syms in delta_groups(warm):
+            iso = pd.Timestamp(t0, unit="s", tz="UTC").strftime("%Y-%m-%dT%H:%M:%SZ")
+            for s, d in DH.bars_multi(syms, iso, end, timeframe, 0).items():
+                if not d.empty: b.write(b.slots[s], to_array(d))
+        if time.time() - self.flushed[timeframe] >= self.flush_sec: self.flush(timeframe)
+        out = {}
+        for s in dict.fromkeys(symbols):
+            v = b.view(b.slots[s], since, limit)
+            if len(v): out[s] = v
+        return out
+    def flush(self, timeframe=None):
+        # write dirty slots back to the disk BarStore (backtests and restarts read it)
+        for tf, b in list(self.blocks.items()):
+            if timeframe is not None and tf != timeframe: continue
+            self.flushed[tf] = time.time()
+            if self.disk is None: continue
+            dirty, b.dirty = b.dirty, set()
+            names = {i: s for s, i in b.slots.items()}
+            for i in dirty:
+                if b.n[i]: self.disk.save(names[i], tf, b.view(i).frame())
+    def export(self):
+        # {timeframe: (symbols, t (S, capacity), x (S, 5, capacity), n)}: each slot's window oldest first, left-aligned
+        out = {}
+        for tf, b in list(self.blocks.items()):
+            names = list(b.slots); S = len(names); t = np.zeros((S, b.cap)); x = np.zeros((S, 5, b.cap), dtype=b.dtype); n = b.n[:S].copy()
+            for s, i in b.slots.items():
+                v = b.view(i); k = len(v); t[i, :k] = v.t; x[i, :, :k] = np.vstack([v.open, v.high, v.low, v.close, v.volume])
+            out[tf] = (names, t, x, n)
+        return out
+    def restore(self, tf, names, t, x, n, keep=None):
+        # load an export() back into the rings (any capacity/dtype; the newest bars win); slots stay dirty so the
+        # next flush brings the .npy files up to the restored state. -> number of slots restored
+        b = self._block(tf); done = 0
+        for j, s in enumerate(names):
+            if keep and not keep(s) or not n[j]: continue
+            k = int(n[j]); b.write(b.slot(s), np.vstack([t[j, :k], x[j, :, :k].astype(np.float64)]), reset=True); done += 1
+        return done
+    def memory(self):
+        # allocated bytes overall, per slot in each timeframe, and per symbol (one slot in every timeframe it uses)
+        slot = {tf: b.nbytes() // len(b.head) for tf, b in self.blocks.items()}; per = {}
+        for tf, b in self.blocks.items():
+            for s in b.slots: per[s] = per.get(s, 0) + slot[tf]
+        return {"allocated_bytes": sum(b.nbytes() for b in self.blocks.values()), "symbols": len(per), "slot_bytes": slot,
+                "bytes_per_symbol": max(per.values()) if per else 0}
@@ -31,3 +31,7 @@ def size_position(price, confidence, equity_cap, risk_frac):
     dollar_risk = equity_cap * risk_frac * conf
     qty = max(1, int(dollar_risk / max(0.5, price*0.01)))
     return qty
+def bracket_levels(px, side, tp_pct, sl_pct, trail_extra_tp_pct):
+    # Two-bracket approach: partial take (tp1) + extended runner (tp2) sharing one stop
+    if side=="buy": return px*(1+tp_pct), px*(1-sl_pct), px*(1+tp_pct*(1+trail_extra_tp_pct))
+    return px*(1-tp_pct), px*(1+sl_pct), px*(1-tp_pct*(1+trail_extra_tp_pct))
@@ -0,0 +1,28 @@
+import time, datetime as dt
+from core import data_hub as DH
+def next_session_boundary(now=None):
+    # next regular-session open/close (UTC, same hours as data_hub.is_open_now)
+    now = now or dt.datetime.utcnow()
+    for h, m in ((13,30), (20,0)):
+        b = now.replace(hour=h, minute=m, second=0, microsecond=0)
+        if b > now: return b
+    return (now + dt.timedelta(days=1)).replace(hour=13, minute=30, second=0, microsecond=0)
+class SmallcapScreener:
+    # Screens symbols_universe from one bulk snapshot pull and reuses the result until its TTL runs out
+    # or the session opens/closes, whichever comes first.
+    def __init__(self, cfg):
+        self.cfg = cfg; self.cached = None; self.expires = 0.0
+    def invalidate(self):
+        self.cached = None; self.expires = 0.0
+    def watchlist(self):
+        if self.cached is not None and time.time() < self.expires: return self.cached
+        wl = self.cfg["watchlist"]; snaps = DH.snapshots(self.cfg.get("symbols_universe", []))
+        out = []
+        for s in self.cfg.get("symbols_universe", []):
+            px, vol = snaps.get(s, (None, None))
+            if px is None or vol is None: continue
+            if px <= wl["smallcap_max_price"] and vol >= wl["smallcap_min_vol"]: out.append(s)
+        now = dt.datetime.utcnow()
+        ttl = min(wl.get("ttl_sec", 1800), (next_session_boundary(now) - now).total_seconds())
+        self.cached = out[:wl.get("max_size", 20)]; self.expires = time.time() + ttl
+        return self.cached
@@ -0,0 +1,106 @@
+import os, json, time, queue, threading
+from core import data_hub as DH
+from core.quotes import TF_SECONDS, _epoch
+try: import websocket   # websocket-client
+except ImportError: websocket = None
+STREAM_URL = os.getenv("ALPACA_STREAM_URL","wss://stream.data.alpaca.markets/v2/iex")
+class MarketStream:
+    # Alpaca market-data websocket on a background thread. Messages are dispatched by their "T" field
+    # ("t" trades, "b" bars, ...) to the handlers registered with on(); the connection is re-established
+    # with backoff and every subscription is replayed after re-auth.
+    def __init__(self, url=None):
+        self.url = url or STREAM_URL; self.handlers = {}; self.subs = {"trades": set(), "bars": set()}
+        self.ws = None; self.thread = None; self.running = False; self.connected = False
+        self.last_msg = 0.0; self.error = None; self.lock = threading.Lock(); self.gen = 0; self.halt = threading.Event()
+    @property
+    def available(self): return websocket is not None
+    def on(self, kind, fn):
+        self.handlers.setdefault(kind, []).append(fn)
+    def subscribe(self, trades=(), bars=()):
+        with self.lock:
+            new = {"trades": sorted(set(trades)-self.subs["trades"]), "bars": sorted(set(bars)-self.subs["bars"])}
+            self.subs["trades"].update(new["trades"]); self.subs["bars"].update(new["bars"])
+        if self.connected and (new["trades"] or new["bars"]): self._send({"action":"subscribe", **new})
+    def start(self):
+        # a thread from an earlier start may still be winding down (connecting, or in recv until its socket
+        # closes); its generation no longer matches, so it exits without authenticating or dispatching
+        if websocket is None or self.running: return False
+        self.gen += 1; self.halt = threading.Event(); self.running = True
+        self.thread = threading.Thread(target=self._run, args=(self.gen, self.halt), daemon=True); self.thread.start(); return True
+    def stop(self):
+        self.running = False; self.halt.set()   # also cuts a reconnect backoff short
+        try:
+            if self.ws: self.ws.close()
+        except Exception: pass
+    def _send(self, obj):
+        try: self.ws.send(json.dumps(obj))
+        except Exception as e: self.error = str(e)
+    def _dispatch(self, raw):
+        self.last_msg = time.time()
+        for m in json.loads(raw):
+            kind = m.get("T")
+            if kind == "success" and m.get("msg") == "authenticated":
+                self.connected = True
+                with self.lock: subs = {k: sorted(v) for k, v in self.subs.items()}
+                if subs["trades"] or subs["bars"]: self._send({"action":"subscribe", **subs})
+            elif kind == "error": self.error = f'{m.get("code")}: {m.get("msg")}'
+            for fn in self.handlers.get(kind, []):
+                try: fn(m)
+                except Exception as e: self.error = str(e)
+    def _run(self, gen, halt):
+        backoff = 1; live = lambda: self.running and self.gen == gen
+        while live():
+            ws = None
+            try:
+                ws = websocket.create_connection(self.url, timeout=10)
+                if not live(): break
+                self.ws = ws; self._send({"action":"auth","key":DH.ALPACA_KEY,"secret":DH.ALPACA_SECRET}); backoff = 1
+                while live():
+                    try: raw = ws.recv()
+                    except websocket.WebSocketTimeoutException: continue
+                    if live(): self._dispatch(raw)
+            except Exception as e:
+                if live(): self.error = str(e)
+            finally:
+                if self.gen == gen: self.connected = False
+                try:
+                    if ws: ws.close()
+                except Exception: pass
+            if live(): halt.wait(backoff); backoff = min(backoff*2, 60)
+class BarAggregator:
+    # Rolls 1Min stream bars ("b" messages) up into every requested timeframe and queues each bar as it
+    # closes. A bucket closes on its last minute bar, when the next bucket starts, or via flush() once it
+    # is `grace` seconds past its end with no closing bar (no trades in the final minute).
+    def __init__(self, timeframes, grace=10):
+        self.spans = {tf: TF_SECONDS[tf] for tf in timeframes}; self.grace = grace
+        self.open = {}; self.closed = queue.Queue(); self.lock = threading.Lock()
+    def on_bar(self, m):
+        sym = m["S"]; t = _epoch(m["t"]); o, h, l, c, v = (float(m[k]) for k in ("o","h","l","c","v"))
+        with self.lock:
+            for tf, span in self.spans.items():
+                start = t - t % span; key = (sym, tf); cur = self.open.get(key)
+                if cur and start < cur["t"]: continue   # late bar for a bucket already closed
+                if cur and start > cur["t"]: self._close(key); cur = None
+                if cur is None: self.open[key] = cur = {"t":start,"open":o,"high":h,"low":l,"close":c,"volume":v}
+                else: cur["high"] = max(cur["high"], h); cur["low"] = min(cur["low"], l); cur["close"] = c; cur["volume"] += v
+                if t + 60 >= start + span: self._close(key)
+    def _close(self, key):
+        self.closed.put((key[0], key[1], self.open.pop(key)))
+    def flush(self, now=None):
+        now = now or time.time()
+        with self.lock:
+            for key in [k for k, b in self.open.items() if b["t"] + self.spans[k[1]] + self.grace <= now]: self._close(key)
+    def discard(self):
+        # drop queued closes (bars that closed while nobody was draining)
+        while True:
+            try: self.closed.get_nowait()
+            except queue.Empty: return
+    def drain(self, timeout=1.0, settle=0.25):
+        # {timeframe: {symbol: [bars]}}; waits up to `timeout` for a close, then `settle` for the rest of the batch
+        self.flush(); out = {}
+        try: item = self.closed.get(timeout=timeout)
+        except queue.Empty: return out
+        while True:
+            sym, tf, bar = item; out.setdefault(tf, {}).setdefault(sym, []).append(bar)
+            try: item = self.closed.get(timeout=settle)
+            except queue.Empty: return out
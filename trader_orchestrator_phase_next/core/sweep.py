@@ -0,0 +1,119 @@
+import os, json, copy, random, argparse, itertools, dataclasses, numpy as np, pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from core import data_hub as DH
+from core.backtest import Backtester, default_strategies, load_bars
+from core.bar_store import to_array, COLS
+from core.features import FEATURES
+# Parallel parameter sweep over the backtest. Every bar of every symbol/timeframe, and its add_features
+# frame (no swept parameter changes features, so the parent computes them once), is packed into a single
+# shared-memory block as float64 (columns, rows) arrays with epoch seconds in row 0. Workers attach at
+# start-up and wrap each array in a DataFrame over the block without copying, so only the time indexes are
+# per worker and nothing bar-sized is pickled per task. A grid key is "<strategy>.<Config field>" or "router.<key>".
+# For every parameter combination each allocation on the tuner grid (step, min_alloc, max_alloc; summing
+# to 1) weights the per-strategy daily PnL, and the best allocation is reported with the combination.
+DEFAULT_GRID = {
+    "balanced_trend.tp_pct": [0.015, 0.02, 0.03], "balanced_trend.sl_pct": [0.0075, 0.01, 0.015],
+    "smallcap_scalper.rsi_long": [52, 55, 60], "smallcap_scalper.rsi_short": [40, 45, 48],
+    "aggr_momentum.rsi_long": [55, 60, 65], "aggr_momentum.rsi_short": [35, 40, 45],
+    "router.prob_long_thresh": [0.45, 0.55], "router.trail_extra_tp_pct": [0.25, 0.5, 1.0],
+}
+_W = {}
+F_COLS = list(COLS) + FEATURES
+def pack(bars):
+    # {timeframe: {symbol: frame}} -> (SharedMemory, layout {("bars"|"features", tf, sym): (offset, columns, rows)})
+    parts, layout, n = [], {}, 0
+    def add(key, a):
+        nonlocal n
+        layout[key] = (n, a.shape[0], a.shape[1]); parts.append(a); n += a.size
+    for tf, frames in bars.items():
+        for sym, df in frames.items():
+            add(("bars", tf, sym), to_array(df)); F = DH.add_features(df)
+            if "rsi" in F: add(("features", tf, sym), np.vstack([to_array(F)[0], F[F_COLS].to_numpy(np.float64).T]))
+    shm = shared_memory.SharedMemory(create=True, size=max(1, n*8))
+    flat = np.ndarray((n,), dtype=np.float64, buffer=shm.buf); pos = 0
+    for a in parts: flat[pos:pos+a.size] = a.ravel(); pos += a.size
+    return shm, layout
+def _frame(arr, columns):
+    # DataFrame over a (1+len(columns), rows) array without copying the values; only the index is built
+    idx = pd.to_datetime(arr[0], unit="s", utc=True); idx.name = "t"
+    return pd.DataFrame(arr[1:].T, index=idx, columns=columns, copy=False)
+def _attach(name, layout, cfg):
+    shm = shared_memory.SharedMemory(name=name); bars, features = {}, {}
+    for (kind, tf, sym), (off, k, n) in layout.items():
+        arr = np.ndarray((k, n), dtype=np.float64, buffer=shm.buf, offset=off*8)
+        if kind == "bars": bars.setdefault(tf, {})[sym] = _frame(arr, list(COLS))
+        else: features[(tf, sym)] = _frame(arr, F_COLS)
+    _W.update(shm=shm, bars=bars, cfg=cfg, features=features)
+def alloc_grid(names, tuner):
+    step = tuner.get("step", 0.05); lo = tuner.get("min_alloc", 0.0); hi = tuner.get("max_alloc", 1.0)
+    units = int(round(1/step)); out = []
+    for combo in itertools.product(range(units+1), repeat=len(names)-1):
+        last = units - sum(combo)
+        w = [c*step for c in combo] + [last*step]
+        if last >= 0 and all(lo - 1e-9 <= x <= hi + 1e-9 for x in w): out.append(dict(zip(names, w)))
+    return out
+def apply_params(cfg, params):
+    # (cfg copy, strategies) with the overrides applied; unknown keys raise
+    cfg = copy.deepcopy(cfg); strategies = []; names = {s[0] for s in default_strategies(cfg)}
+    for key, val in params.items():
+        head, field = key.split(".", 1)
+        if head == "router": cfg["router"][field] = val
+        elif head not in names: raise ValueError(f"unknown sweep key {key}")
+    for name, impl, symbols in default_strategies(cfg):
+        over = {k.split(".", 1)[1]: v for k, v in params.items() if k.split(".", 1)[0] == name}
+        if over: impl = type(impl)(dataclasses.replace(impl.cfg, **over))
+        strategies.append((name, impl, symbols))
+    return cfg, strategies
+def _metrics(daily):
+    pnl = daily.sum(); curve = daily.cumsum().to_numpy()
+    dd = float(np.max(np.maximum.accumulate(np.concatenate([[0.0], curve]))[1:] - curve)) if len(curve) else 0.0
+    sd = daily.std()
+    return {"pnl": float(pnl), "max_dd": dd, "sharpe": float(daily.mean()/sd*np.sqrt(252)) if len(daily) > 1 and sd > 0 else 0.0}
+def evaluate(params):
+    cfg, strategies = apply_params(_W["cfg"], params)
+    res = Backtester(cfg).run(_W["bars"], strategies, _W["features"]); t = res.trades
+    names = [s[0] for s in strategies]
+    daily = (t.assign(day=t["exit_ts"].dt.floor("D")).pivot_table(index="day", columns="strategy", values="pnl", aggfunc="sum")
+             .reindex(columns=names).fillna(0.0)) if len(t) else pd.DataFrame(columns=names, dtype=float)
+    row = {**params, "trades": len(t), "win_rate": float((t["pnl"] > 0).mean()) if len(t) else 0.0}
+    row.update(_metrics(daily.sum(axis=1)))
+    grid = alloc_grid(names, cfg.get("tuner", {}))
+    if grid and len(daily) > 1:
+        # every allocation at once: (days x strategies) @ (strategies x allocations)
+        W = np.array([[w[n] for n in names] for w in grid]).T; P = daily.to_numpy() @ W
+        sd = P.std(axis=0, ddof=1); sharpe = np.where(sd > 0, P.mean(axis=0)/np.where(sd > 0, sd, 1)*np.sqrt(252), 0.0)
+        b = int(np.argmax(sharpe)); m = _metrics(pd.Series(P[:, b]))
+        row.update({f"alloc.{k}": v for k, v in grid[b].items()})
+        row.update({"alloc_pnl": m["pnl"], "alloc_sharpe": m["sharpe"], "alloc_max_dd": m["max_dd"]})
+    return row
+def combos(grid, samples=0, seed=0):
+    keys = list(grid); every = list(itertools.product(*(grid[k] for k in keys)))
+    if samples and samples < len(every): every = random.Random(seed).sample(every, samples)
+    return [dict(zip(keys, v)) for v in every]
+def sweep(cfg, bars, grid=None, samples=0, workers=None, metric="sharpe", seed=0):
+    shm, layout = pack(bars)
+    try:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_attach, initargs=(shm.name, layout, cfg)) as ex:
+            rows = list(ex.map(evaluate, combos(grid or DEFAULT_GRID, samples, seed)))
+    finally:
+        shm.close(); shm.unlink()
+    return pd.DataFrame(rows).sort_values(metric, ascending=False).reset_index(drop=True)
+def main():
+    ap = argparse.ArgumentParser(description="Parallel parameter sweep over the backtest")
+    ap.add_argument("--data", default=os.path.join(os.getenv("STATE_DIR","./state"), "bars"))
+    ap.add_argument("--config", default="config.json"); ap.add_argument("--grid", default="", help="JSON file {key: [values]}")
+    ap.add_argument("--samples", type=int, default=0, help="random combinations instead of the full grid")
+    ap.add_argument("--workers", type=int, default=0); ap.add_argument("--metric", default="sharpe")
+    ap.add_argument("--top", type=int, default=20); ap.add_argument("--out", default="")
+    a = ap.parse_args()
+    with open(a.config) as f: cfg = json.load(f)
+    grid = None
+    if a.grid:
+        with open(a.grid) as f: grid = json.load(f)
+    bars = {impl.cfg.timeframe: load_bars(a.data, impl.cfg.timeframe) for _, impl, _ in default_strategies(cfg)}
+    table = sweep(cfg, bars, grid, a.samples, a.workers or None, a.metric)
+    print(table.head(a.top).to_string())
+    if a.out: table.to_csv(a.out, index=False)
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+import numpy as np
 FEATURES = ["ret1","ret5","vol","rsi","macd","macd_sig","macd_hist"]
 @dataclass
 class Config:
@@ -6,6 +7,8 @@ class Config:
     tp_pct: float = 0.03
     sl_pct: float = 0.015
     max_positions: int = 2
+    rsi_long: float = 60.0
+    rsi_short: float = 40.0
     shadow: bool = False
 class AggressiveMomentum:
     name = "aggr_momentum"
@@ -16,6 +19,15 @@ class AggressiveMomentum:
     def generate_signal(self, df_features):
         if df_features is None or len(df_features)<60: return (None, 0.0)
         row = df_features.iloc[-1]
-        if row["macd_hist"] > 0 and row["rsi"] > 60: return ("buy", 0.65)
-        if row["macd_hist"] < 0 and row["rsi"] < 40: return ("sell", 0.6)
+        if row["macd_hist"] > 0 and row["rsi"] > self.cfg.rsi_long: return ("buy", 0.65)
+        if row["macd_hist"] < 0 and row["rsi"] < self.cfg.rsi_short: return ("sell", 0.6)
         return (None, 0.0)
+    def generate_signals(self, df_features):
+        # whole-frame form of generate_signal for backtests: side (+1 buy, -1 sell, 0) and confidence per row
+        n = len(df_features); side = np.zeros(n, dtype=np.int8); conf = np.zeros(n)
+        if n < 60 or "rsi" not in df_features: return side, conf
+        h = df_features["macd_hist"].to_numpy(); r = df_features["rsi"].to_numpy()
+        buy = (h > 0) & (r > self.cfg.rsi_long); sell = ~buy & (h < 0) & (r < self.cfg.rsi_short)
+        side[buy] = 1; conf[buy] = 0.65; side[sell] = -1; conf[sell] = 0.6
+        side[:59] = 0; conf[:59] = 0.0
+        return side, conf
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+import numpy as np
 FEATURES = ["ret1","ret5","vol","rsi","macd","macd_sig","macd_hist"]
 @dataclass
 class Config:
@@ -6,6 +7,7 @@ class Config:
     tp_pct: float = 0.02
     sl_pct: float = 0.01
     max_positions: int = 3
+    rsi_mid: float = 50.0
     shadow: bool = False
 class BalancedTrend:
     name = "balanced_trend"
@@ -16,8 +18,19 @@ class BalancedTrend:
     def generate_signal(self, df_features):
         if df_features is None or len(df_features)<70: return (None, 0.0)
         row = df_features.iloc[-1]
-        long_bias = row["macd"] > row["macd_sig"] and row["rsi"] > 50
-        short_bias = row["macd"] < row["macd_sig"] and row["rsi"] < 50
-        if long_bias: return ("buy", float(min(0.9, 0.5 + (row["rsi"]-50)/100)))
-        if short_bias: return ("sell", float(min(0.9, 0.5 + (50-row["rsi"])/100)))
+        mid = self.cfg.rsi_mid
+        long_bias = row["macd"] > row["macd_sig"] and row["rsi"] > mid
+        short_bias = row["macd"] < row["macd_sig"] and row["rsi"] < mid
+        if long_bias: return ("buy", float(min(0.9, 0.5 + (row["rsi"]-mid)/100)))
+        if short_bias: return ("sell", float(min(0.9, 0.5 + (mid-row["rsi"])/100)))
         return (None, 0.0)
+    def generate_signals(self, df_features):
+        # whole-frame form of generate_signal for backtests: side (+1 buy, -1 sell, 0) and confidence per row
+        n = len(df_features); side = np.zeros(n, dtype=np.int8); conf = np.zeros(n)
+        if n < 70 or "rsi" not in df_features: return side, conf
+        m = df_features["macd"].to_numpy(); sg = df_features["macd_sig"].to_numpy(); r = df_features["rsi"].to_numpy()
+        mid = self.cfg.rsi_mid; buy = (m > sg) & (r > mid); sell = ~buy & (m < sg) & (r < mid)
+        side[buy] = 1; conf[buy] = np.minimum(0.9, 0.5 + (r[buy]-mid)/100)
+        side[sell] = -1; conf[sell] = np.minimum(0.9, 0.5 + (mid-r[sell])/100)
+        side[:69] = 0; conf[:69] = 0.0
+        return side, conf
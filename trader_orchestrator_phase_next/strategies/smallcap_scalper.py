@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+import numpy as np
 FEATURES = ["ret1","ret5","vol","rsi","macd","macd_sig","macd_hist"]
 @dataclass
 class Config:
@@ -6,6 +7,8 @@ class Config:
     tp_pct: float = 0.012
     sl_pct: float = 0.006
     max_positions: int = 5
+    rsi_long: float = 55.0
+    rsi_short: float = 45.0
     shadow: bool = False
 class SmallCapScalper:
     name = "smallcap_scalper"
@@ -16,6 +19,15 @@ class SmallCapScalper:
     def generate_signal(self, df_features):
         if df_features is None or len(df_features)<40: return (None, 0.0)
         row = df_features.iloc[-1]
-        if row["rsi"] > 55 and row["macd_hist"] > 0: return ("buy", 0.6)
-        if row["rsi"] < 45 and row["macd_hist"] < 0: return ("sell", 0.55)
+        if row["rsi"] > self.cfg.rsi_long and row["macd_hist"] > 0: return ("buy", 0.6)
+        if row["rsi"] < self.cfg.rsi_short and row["macd_hist"] < 0: return ("sell", 0.55)
         return (None, 0.0)
+    def generate_signals(self, df_features):
+        # whole-frame form of generate_signal for backtests: side (+1 buy, -1 sell, 0) and confidence per row
+        n = len(df_features); side = np.zeros(n, dtype=np.int8); conf = np.zeros(n)
+        if n < 40 or "rsi" not in df_features: return side, conf
+        h = df_features["macd_hist"].to_numpy(); r = df_features["rsi"].to_numpy()
+        buy = (r > self.cfg.rsi_long) & (h > 0); sell = ~buy & (r < self.cfg.rsi_short) & (h < 0)
+        side[buy] = 1; conf[buy] = 0.6; side[sell] = -1; conf[sell] = 0.55
+        side[:39] = 0; conf[:39] = 0.0
+        return side, conf
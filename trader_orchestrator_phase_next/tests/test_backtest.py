@@ -0,0 +1,45 @@
+import copy, json, os, types, numpy as np, pandas as pd
+from core.backtest import Backtester
+CFG = json.load(open(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.json")))
+DAY = 78   # 5Min bars in a 13:30-20:00 UTC session
+class _Signals:
+    # stub strategy: fixed long signals (conf 1) at the given bar positions, features frame == bars frame
+    def __init__(self, at):
+        self.at = set(at); self.cfg = types.SimpleNamespace(timeframe="5Min", tp_pct=0.02, sl_pct=0.01, max_positions=3)
+    def generate_signals(self, F):
+        side = np.array([1 if i in self.at else 0 for i in range(len(F))], dtype=np.int8)
+        return side, side.astype(np.float64)
+def sessions(days=1):
+    # flat 100 bars (high 100.1, low 99.9) from 2024-01-02 on, one weekday session per day
+    idx = pd.DatetimeIndex([pd.Timestamp("2024-01-02 13:30", tz="UTC") + pd.Timedelta(days=d, minutes=5*i) for d in range(days) for i in range(DAY)])
+    return pd.DataFrame({"open": 100.0, "high": 100.1, "low": 99.9, "close": 100.0, "volume": 1e3}, index=idx)
+def run(df, at, **risk):
+    cfg = copy.deepcopy(CFG); cfg["risk"].update({"skip_minutes_after_open": 0, **risk})
+    F = df.assign(rsi=50.0)
+    return Backtester(cfg).run({"5Min": {"SPY": df}}, [("stub", _Signals(at), ["SPY"])], {("5Min", "SPY"): F}).trades
+def test_exits():
+    # qty 200 at 100 -> legs of 100: tp1 102, tp2 103, stop 99 (stop wins a bar that prints both)
+    df = sessions(); hi = df.columns.get_loc("high"); lo = df.columns.get_loc("low")
+    df.iloc[12, hi] = 102.5; df.iloc[15, hi] = 103.5           # entry at 10: tp1 on bar 12, tp2 on bar 15
+    df.iloc[31, hi] = 102.5; df.iloc[31, lo] = 98.5            # entry at 30: both print, stop wins both legs
+    df.iloc[51, hi] = 102.5                                    # entry at 50: runner rides to the day's close
+    t = run(df, [10, 30, 50])
+    assert t["qty"].tolist() == [200, 200, 200]
+    assert t[["exit_px1", "exit_px2"]].values.tolist() == [[102.0, 103.0], [99.0, 99.0], [102.0, 100.0]]
+    assert np.allclose(t["pnl"], [500.0, -200.0, 200.0])
+    assert t["exit_ts"].iloc[2] == df.index[-1] + pd.Timedelta(minutes=5)
+def test_daily_drawdown_gate():
+    # each entry is stopped out on the next bar for -200; after two the day is down 4% >= 3% and entries stop
+    df = sessions(2); lo = df.columns.get_loc("low")
+    at = [10, 20, 30, 40, DAY+10]
+    for k in at: df.iloc[k+1, lo] = 98.5
+    t = run(df, at, max_daily_drawdown_pct=3.0)
+    assert t["entry_ts"].tolist() == [df.index[k] + pd.Timedelta(minutes=5) for k in (10, 20, DAY+10)]
+def test_skip_after_open():
+    # bar 7 closes 14:10 (40 min in, skipped), bar 8 closes 14:15 (45 min in, like minutes_since_open >= 45 live)
+    df = sessions(); lo = df.columns.get_loc("low")
+    at = [0, 7, 8, 30]
+    for k in at: df.iloc[k+1, lo] = 98.5   # stopped on the next bar, so the symbol is free again
+    taken = lambda t: [int((x - df.index[0]).total_seconds() // 300) - 1 for x in t["entry_ts"]]
+    assert taken(run(df, at, max_daily_drawdown_pct=50.0)) == at
+    assert taken(run(df, at, max_daily_drawdown_pct=50.0, skip_minutes_after_open=45)) == [8, 30]
@@ -0,0 +1,39 @@
+import numpy as np, pandas as pd, pytest
+from core import data_hub as DH
+from core.bar_store import BarStore
+from core.ringstore import RingStore
+# warm refreshes: one delta request per group of similar last bars, so a halted symbol doesn't drag the rest back
+IDX = pd.date_range("2026-10-08", periods=1100, freq="5min", tz="UTC", name="t")
+HALTED = pd.Timestamp("2026-10-09", tz="UTC")
+def fake_bars_multi(calls):
+    def bars_multi(symbols, start, end, timeframe, limit):
+        calls.append((sorted(symbols), start)); out = {}
+        for s in symbols:
+            i = IDX[IDX >= pd.Timestamp(start)]
+            if s == "HALT": i = i[i < HALTED]
+            out[s] = pd.DataFrame({c: np.arange(len(i)) + 1.0 for c in ("open","high","low","close","volume")}, index=i)
+        return out
+    return bars_multi
+@pytest.mark.parametrize("make", [lambda d: BarStore(str(d)), lambda d: RingStore(BarStore(str(d)))])
+def test_warm_refresh_groups_delta_requests(make, tmp_path, monkeypatch):
+    calls = []; monkeypatch.setattr(DH, "bars_multi", fake_bars_multi(calls))
+    store = make(tmp_path); syms = ["HALT"] + [f"S{i}" for i in range(20)]; window = ("2026-10-08T00:00:00Z", "2026-10-12T00:00:00Z")
+    store.refresh(syms, "5Min", *window); calls.clear()
+    out = store.refresh(syms, "5Min", *window)
+    assert calls == [(["HALT"], "2026-10-08T23:55:00Z"), (sorted(syms[1:]), "2026-10-11T19:35:00Z")]
+    assert len(out["S1"]) == 1000 and len(out["HALT"]) == 288
+def frame(ts, close):
+    idx = pd.DatetimeIndex(ts, tz="UTC", name="t")
+    return pd.DataFrame({c: np.asarray(close, dtype=float) for c in ("open","high","low","close","volume")}, index=idx)
+@pytest.mark.parametrize("make", [lambda d: BarStore(str(d)), lambda d: RingStore(BarStore(str(d)))])
+def test_append_ignores_late_bars_and_replaces_the_last(make, tmp_path, monkeypatch):
+    monkeypatch.setattr(DH, "bars_multi", lambda symbols, *a: {s: frame(IDX[:100], np.arange(100)) for s in symbols})
+    store = make(tmp_path); store.refresh(["X"], "5Min", "2026-10-08T00:00:00Z", "2026-10-12T00:00:00Z")
+    def stored(): return store.load("X", "5Min") if isinstance(store, BarStore) else store.view("X", "5Min").frame()
+    assert store.append("Y", "5Min", frame(IDX[:1], [1])) is None   # no REST history: the caller backfills
+    assert len(store.append("X", "5Min", frame(IDX[90:91], [-1]))) == 0   # late close: dropped, nothing newer
+    assert len(stored()) == 100 and stored()["close"].iloc[90] == 90
+    # out of order within one batch, a replacement for the last bar, and a new bar
+    out = store.append("X", "5Min", frame([IDX[100], IDX[50], IDX[99]], [100.5, -1, 99.5]))
+    df = stored()
+    assert len(out) == len(df) == 101 and list(df["close"].iloc[-3:]) == [98, 99.5, 100.5] and df["close"].iloc[50] == 50
@@ -0,0 +1,19 @@
+from core.metrics import Registry
+def family(line):
+    # metric family a sample line belongs to (summary _sum/_count fold into their summary)
+    name = line.split("{")[0].split(" ")[0]
+    for suffix in ("_sum", "_count"):
+        if name.endswith("_seconds" + suffix): return name[:-len(suffix)]
+    return name
+def test_render_keeps_each_family_contiguous():
+    r = Registry()
+    r.observe("stage", 0.1, stage="fetch"); r.observe("stage", 0.2, True, stage="order")
+    r.observe("http_request", 0.3, api="data", endpoint="bars"); r.observe("tick", 0.4)
+    lines = [l for l in r.render().splitlines() if l]; order = []
+    for l in lines:
+        f = l.split()[2] if l.startswith("# TYPE") else family(l)
+        if not order or order[-1] != f: order.append(f)
+    assert len(order) == len(set(order)), order
+    types = [l.split()[2] for l in lines if l.startswith("# TYPE")]
+    assert types == order   # each family opens with its own TYPE line
+    assert 'orch_stage_errors_total{stage="order"} 1' in lines and "orch_tick_errors_total 0" in lines
@@ -0,0 +1,145 @@
+# Local stand-in for the whole Alpaca REST surface the orchestrator uses (market data + trading), in three modes:
+#   synth   deterministic regular-session bars for any symbol and timeframe, bulk snapshots, and the fake_broker
+#           trading endpoints; any universe size works, which is what bench/ scales on
+#   record  a proxy in front of the real APIs that writes every request/response pair to a cassette (JSONL)
+#   replay  serves a cassette back: requests match on method, path and query minus the start/end window, and
+#           repeats of one request are answered in recorded order (the last one sticks)
+#   python tools/fake_alpaca.py synth --port 8767      then   ALPACA_DATA_BASE=ALPACA_PAPER_BASE=http://127.0.0.1:8767
+#   python tools/fake_alpaca.py record --out tick.jsonl --port 8767      (real keys in the app's env as usual)
+#   python tools/fake_alpaca.py replay --cassette tick.jsonl --port 8767
+import os, sys, json, time, zlib, argparse, threading, datetime as dt, numpy as np, requests
+from http.server import ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, urlencode
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_broker import Broker, Handler as BrokerHandler
+TF_MIN = {"1Min": 1, "2Min": 2, "5Min": 5, "15Min": 15, "1Hour": 60, "1Day": 390}
+WINDOW_KEYS = ("start", "end")
+def _iso(sec):
+    return dt.datetime.fromtimestamp(sec, dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+class Synth:
+    # one fixed history per (symbol, timeframe): weekday bars between 13:30 and 20:00 UTC from `days` back up to
+    # the end of today's session, as a random walk seeded by the symbol; bars are pre-encoded once
+    def __init__(self, days=14):
+        self.days = days; self.series = {}; self.lock = threading.Lock(); now = time.time()
+        self.origin = (int(now // 86400) - days) * 86400; self.until = (int(now // 86400) + 1) * 86400
+    def _build(self, sym, tf):
+        step = TF_MIN.get(tf, 5) * 60; ts = []
+        for day in range(self.origin, self.until, 86400):
+            if dt.datetime.fromtimestamp(day, dt.timezone.utc).weekday() >= 5: continue
+            ts.extend(range(day + 13*3600 + 1800, day + 20*3600, step) if tf != "1Day" else [day + 4*3600])
+        t = np.array(ts, dtype=np.int64); h = zlib.crc32(sym.encode())
+        rng = np.random.default_rng(h ^ zlib.crc32(tf.encode()))
+        base = 2.0 + (h % 30000) / 100.0
+        c = base * np.exp(np.cumsum(rng.normal(0, 0.002*np.sqrt(step/60), len(t)))); o = np.r_[c[0], c[:-1]]
+        hi = np.maximum(o, c) * (1 + rng.uniform(0, 0.001, len(t))); lo = np.minimum(o, c) * (1 - rng.uniform(0, 0.001, len(t)))
+        v = rng.integers(1000, 50000, len(t)) * (10 if base < 10 else 1)
+        iso = np.datetime_as_string(t.astype("datetime64[s]"), unit="s")
+        enc = [f'{{"t":"{a}Z","o":{b:.4f},"h":{d:.4f},"l":{e:.4f},"c":{f:.4f},"v":{g}}}' for a, b, d, e, f, g in zip(iso, o, hi, lo, c, v.tolist())]
+        return t, enc, float(c[-1]), int(v[-1]) * 400
+    def get(self, sym, tf):
+        key = (sym, tf); s = self.series.get(key)
+        if s is None:
+            s = self._build(sym, tf)
+            with self.lock: self.series[key] = s
+        return s
+    def window(self, sym, tf, start, end):
+        t, enc, _, _ = self.get(sym, tf)
+        a = np.searchsorted(t, _epoch(start, 0), "left"); b = np.searchsorted(t, _epoch(end, time.time()), "right")
+        return enc[a:b]
+def _epoch(s, default):
+    if not s: return default
+    return dt.datetime.fromisoformat(s.replace("Z", "+00:00")).timestamp()
+def _query_key(method, path, q):
+    return json.dumps([method, path, sorted((k, v) for k, v in q.items() if k not in WINDOW_KEYS)])
+class Handler(BrokerHandler):
+    def _raw(self, code, data, ctype="application/json"):
+        data = data.encode() if isinstance(data, str) else data; self.send_response(code)
+        self.send_header("Content-Type", ctype); self.send_header("Content-Length", str(len(data))); self.end_headers(); self.wfile.write(data)
+    def _route(self, method):
+        mode = self.server.mode
+        if mode == "record": return self._record(method)
+        if mode == "replay": return self._replay(method)
+        u = urlparse(self.path)
+        if u.path == "/_synth/preload":
+            # build (and encode) series ahead of a timed run: {"symbols": [...], "timeframes": [...]}
+            n = int(self.headers.get("Content-Length") or 0); req = json.loads(self.rfile.read(n) or b"{}")
+            for tf in req.get("timeframes", []) + ["1Day"]:
+                for sym in req.get("symbols", []): self.server.synth.get(sym, tf)
+            return self._send(200, {"series": len(self.server.synth.series)})
+        if not u.path.startswith("/v2/stocks"): return super()._route(method)
+        q = {k: v[0] for k, v in parse_qs(u.query).items()}; syn = self.server.synth; tf = q.get("timeframe", "5Min")
+        if u.path == "/v2/stocks/bars":
+            # multi-symbol bars, symbol by symbol, paged by bar count like the real endpoint
+            limit = int(q.get("limit", 10000)); off = int(q.get("page_token") or 0)
+            lists = [(s, syn.window(s, tf, q.get("start"), q.get("end"))) for s in q.get("symbols", "").split(",")]
+            total = sum(len(r) for _, r in lists); stop = min(total, off + limit); parts = []; n = 0
+            for s, rows in lists:
+                a, b = max(off, n), min(stop, n + len(rows))
+                if a < b: parts.append((s, rows[a-n:b-n]))
+                n += len(rows)
+            more = stop < total; served = stop
+            body = ",".join(f'"{s}":[{",".join(rows)}]' for s, rows in parts if rows)
+            return self._raw(200, f'{{"bars":{{{body}}},"next_page_token":{json.dumps(str(served) if more else None)}}}')
+        if u.path == "/v2/stocks/snapshots":
+            out = {}
+            for s in q.get("symbols", "").split(","):
+                _, _, px, vol = syn.get(s, "1Day"); now = _iso(time.time())
+                out[s] = {"dailyBar": {"c": px, "v": vol, "t": now}, "latestTrade": {"p": px, "t": now}}
+            return self._send(200, out)
+        if u.path.endswith("/bars"):
+            s = u.path.split("/")[3]; rows = syn.window(s, tf, q.get("start"), q.get("end"))[-int(q.get("limit", 1000)):]
+            return self._raw(200, f'{{"bars":[{",".join(rows)}],"symbol":"{s}","next_page_token":null}}')
+        self._send(404, {"message": "not found"})
+    def _record(self, method):
+        u = urlparse(self.path); n = int(self.headers.get("Content-Length") or 0); body = self.rfile.read(n) if n else None
+        up = self.server.data_upstream if u.path.startswith("/v2/stocks") else self.server.trade_upstream
+        hdr = {k: v for k, v in self.headers.items() if k.lower().startswith("apca-") or k.lower() == "content-type"}
+        try: r = requests.request(method, up + self.path, headers=hdr, data=body, timeout=30); status, text = r.status_code, r.text
+        except requests.RequestException as e: status, text = 502, json.dumps({"message": str(e)})
+        q = {k: v[0] for k, v in parse_qs(u.query).items()}
+        rec = {"method": method, "path": u.path, "query": q, "body": json.loads(body) if body else None, "status": status, "response": text}
+        with self.server.lock:
+            self.server.out.write(json.dumps(rec) + "\n"); self.server.out.flush()
+        self._raw(status, text)
+    def _replay(self, method):
+        u = urlparse(self.path); q = {k: v[0] for k, v in parse_qs(u.query).items()}
+        n = int(self.headers.get("Content-Length") or 0); body = json.loads(self.rfile.read(n)) if n else None
+        key = _query_key(method, u.path, q)
+        with self.server.lock:
+            recs = self.server.cassette.get(key); i = self.server.cursor.get(key, 0)
+            if recs: self.server.cursor[key] = min(i + 1, len(recs) - 1)
+            else: self.server.misses += 1
+        if not recs: return self._send(404, {"message": f"not in cassette: {method} {u.path}?{urlencode(q)}"})
+        rec = recs[i]; text = rec["response"]
+        if method == "POST" and body and body.get("client_order_id") and rec["status"] < 300:
+            text = json.dumps({**json.loads(text), "client_order_id": body["client_order_id"]})   # ids are fresh per run
+        self._raw(rec["status"], text)
+def load_cassette(path):
+    out = {}
+    with open(path) as f:
+        for line in f:
+            if not line.strip(): continue
+            rec = json.loads(line)
+            q = rec["query"] if rec["method"] != "POST" else {}   # order bodies carry per-run ids; POSTs replay in order
+            out.setdefault(_query_key(rec["method"], rec["path"], q), []).append(rec)
+    return out
+def serve(port=8767, mode="synth", cassette=None, out=None, data_upstream="https://data.alpaca.markets",
+          trade_upstream="https://paper-api.alpaca.markets", **broker):
+    srv = ThreadingHTTPServer(("127.0.0.1", port), Handler); srv.daemon_threads = True
+    srv.mode = mode; srv.lock = threading.Lock(); srv.broker = Broker(**broker); srv.synth = Synth()
+    srv.cassette = load_cassette(cassette) if cassette else {}; srv.cursor = {}; srv.misses = 0
+    srv.out = open(out, "a") if out else None; srv.data_upstream = data_upstream; srv.trade_upstream = trade_upstream
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(); ap.add_argument("mode", choices=["synth", "record", "replay"])
+    ap.add_argument("--port", type=int, default=8767); ap.add_argument("--cassette", default=""); ap.add_argument("--out", default="cassette.jsonl")
+    ap.add_argument("--data-upstream", default=os.getenv("ALPACA_DATA_UPSTREAM", "https://data.alpaca.markets"))
+    ap.add_argument("--trade-upstream", default=os.getenv("ALPACA_TRADE_UPSTREAM", "https://paper-api.alpaca.markets"))
+    ap.add_argument("--rate-per-min", type=int, default=200)
+    a = ap.parse_args()
+    srv = serve(a.port, a.mode, a.cassette or None, a.out if a.mode == "record" else None, a.data_upstream, a.trade_upstream, rate_per_min=a.rate_per_min)
+    print(f"fake alpaca ({a.mode}) on http://127.0.0.1:{a.port}", flush=True)
+    while True:
+        time.sleep(10)
+        if a.mode == "replay" and srv.misses: print(f"cassette misses: {srv.misses}", flush=True)
@@ -0,0 +1,65 @@
+# Local stand-in for the Alpaca trading API (stdlib only) for exercising order_router: account, positions,
+# order submit / lookup by client_order_id / cancel, close-all. It enforces its own per-minute request limit
+# (429 with Retry-After past it), rejects duplicate client_order_ids with 422 like the real broker, and can
+# inject failures: --fail-rate answers that share of order POSTs with a 503, and --lose-rate accepts the
+# order but answers 504 anyway, which is the case idempotent retries have to get right.
+#   python tools/fake_broker.py --port 8766 --fail-rate 0.2      then   ALPACA_PAPER_BASE=http://127.0.0.1:8766
+import json, time, uuid, random, argparse, threading
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+class Broker:
+    def __init__(self, rate_per_min=200, fail_rate=0.0, lose_rate=0.0, seed=None):
+        self.rate = rate_per_min; self.fail_rate = fail_rate; self.lose_rate = lose_rate; self.rng = random.Random(seed)
+        self.lock = threading.Lock(); self.hits = deque(); self.orders = {}; self.stats = {"requests": 0, "throttled": 0, "failed": 0, "lost": 0, "duplicates": 0}
+    def throttled(self):
+        with self.lock:
+            now = time.monotonic(); self.stats["requests"] += 1
+            while self.hits and now - self.hits[0] > 60: self.hits.popleft()
+            if len(self.hits) >= self.rate: self.stats["throttled"] += 1; return True
+            self.hits.append(now); return False
+    def submit(self, data):
+        # -> (status, body)
+        with self.lock:
+            roll = self.rng.random()
+            if roll < self.fail_rate: self.stats["failed"] += 1; return 503, {"message": "service unavailable"}
+            cid = data.get("client_order_id") or uuid.uuid4().hex
+            if cid in self.orders: self.stats["duplicates"] += 1; return 422, {"message": "client_order_id must be unique"}
+            order = {**data, "id": uuid.uuid4().hex, "client_order_id": cid, "status": "accepted", "created_at": time.time()}
+            self.orders[cid] = order
+            if roll < self.fail_rate + self.lose_rate: self.stats["lost"] += 1; return 504, {"message": "gateway timeout"}
+            return 200, order
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    def log_message(self, *a): pass
+    def _send(self, code, body, extra=None):
+        data = json.dumps(body).encode(); self.send_response(code)
+        self.send_header("Content-Type", "application/json"); self.send_header("Content-Length", str(len(data)))
+        for k, v in (extra or {}).items(): self.send_header(k, v)
+        self.end_headers(); self.wfile.write(data)
+    def _route(self, method):
+        b = self.server.broker; u = urlparse(self.path); n = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(n)) if n else None
+        if b.throttled(): return self._send(429, {"message": "too many requests"}, {"Retry-After": "1"})
+        if method == "GET" and u.path == "/v2/account": return self._send(200, {"equity": "10000", "last_equity": "10000", "status": "ACTIVE"})
+        if method == "GET" and u.path == "/v2/positions": return self._send(200, [])
+        if method == "GET" and u.path == "/v2/orders:by_client_order_id":
+            o = b.orders.get(parse_qs(u.query).get("client_order_id", [""])[0])
+            return self._send(200, o) if o else self._send(404, {"message": "order not found"})
+        if method == "GET" and u.path == "/v2/orders": return self._send(200, list(b.orders.values()))
+        if method == "POST" and u.path == "/v2/orders": return self._send(*b.submit(body or {}))
+        if method == "DELETE" and u.path in ("/v2/orders", "/v2/positions"): return self._send(207, [])
+        self._send(404, {"message": "not found"})
+    def do_GET(self): self._route("GET")
+    def do_POST(self): self._route("POST")
+    def do_DELETE(self): self._route("DELETE")
+def serve(port=8766, **kw):
+    srv = ThreadingHTTPServer(("127.0.0.1", port), Handler); srv.daemon_threads = True; srv.broker = Broker(**kw)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(); ap.add_argument("--port", type=int, default=8766); ap.add_argument("--rate-per-min", type=int, default=200)
+    ap.add_argument("--fail-rate", type=float, default=0.0); ap.add_argument("--lose-rate", type=float, default=0.0)
+    a = ap.parse_args(); srv = serve(a.port, rate_per_min=a.rate_per_min, fail_rate=a.fail_rate, lose_rate=a.lose_rate)
+    print(f"fake broker on http://127.0.0.1:{a.port}")
+    while True: time.sleep(10); print(json.dumps({**srv.broker.stats, "orders": len(srv.broker.orders)}))
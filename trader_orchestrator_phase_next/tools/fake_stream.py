@@ -0,0 +1,84 @@
+# Local stand-in for the Alpaca market-data websocket (stdlib only). It accepts any auth, remembers
+# subscriptions and pushes a synthetic random-walk trade for every subscribed symbol each `every` seconds.
+# With bar_every set it also pushes 1Min bars for bar subscriptions on a simulated clock that starts at the
+# next quarter hour and advances one minute per push, so stream mode can be exercised without waiting.
+#   python tools/fake_stream.py --port 8765      then   ALPACA_STREAM_URL=ws://127.0.0.1:8765
+import sys, json, time, base64, hashlib, random, struct, socket, argparse, threading, datetime as dt
+from socketserver import ThreadingTCPServer, BaseRequestHandler
+GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+def _recv_exact(sock, n):
+    buf = b""
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk: raise ConnectionError("closed")
+        buf += chunk
+    return buf
+def read_frame(sock):
+    b1, b2 = _recv_exact(sock, 2); op = b1 & 0x0F; n = b2 & 0x7F
+    if n == 126: n = struct.unpack(">H", _recv_exact(sock, 2))[0]
+    elif n == 127: n = struct.unpack(">Q", _recv_exact(sock, 8))[0]
+    mask = _recv_exact(sock, 4) if b2 & 0x80 else b"\0\0\0\0"
+    data = bytes(c ^ mask[i % 4] for i, c in enumerate(_recv_exact(sock, n)))
+    return op, data
+def send_frame(sock, text, op=0x1):
+    data = text.encode() if isinstance(text, str) else text; n = len(data)
+    head = bytes([0x80 | op]) + (bytes([n]) if n < 126 else bytes([126]) + struct.pack(">H", n) if n < 65536 else bytes([127]) + struct.pack(">Q", n))
+    sock.sendall(head + data)
+class Handler(BaseRequestHandler):
+    def handle(self):
+        sock = self.request; req = b""
+        while b"\r\n\r\n" not in req: req += sock.recv(4096)
+        key = [l.split(b":", 1)[1].strip() for l in req.split(b"\r\n") if l.lower().startswith(b"sec-websocket-key")][0]
+        accept = base64.b64encode(hashlib.sha1(key + GUID.encode()).digest()).decode()
+        sock.sendall(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+        lock = threading.Lock(); subs = set(); bar_subs = set(); alive = [True]
+        def send(obj):
+            with lock: send_frame(sock, json.dumps(obj))
+        send([{"T":"success","msg":"connected"}])
+        def pump():
+            px = {}
+            while alive[0]:
+                time.sleep(self.server.every)
+                now = dt.datetime.utcnow().isoformat() + "Z"; out = []
+                for s in sorted(subs):
+                    px[s] = px.get(s, 10 + sum(map(ord, s)) % 90) * (1 + random.gauss(0, 0.0005))
+                    out.append({"T":"t","S":s,"p":round(px[s], 4),"s":100,"t":now})
+                try:
+                    if out: send(out)
+                except OSError: return
+        def pump_bars():
+            px = {}; now = dt.datetime.utcnow(); clock = now.replace(minute=now.minute - now.minute % 15, second=0, microsecond=0) + dt.timedelta(minutes=15)
+            while alive[0]:
+                time.sleep(self.server.bar_every); out = []
+                for s in sorted(bar_subs):
+                    o = px.get(s, 10 + sum(map(ord, s)) % 90); c = px[s] = o * (1 + random.gauss(0, 0.002))
+                    out.append({"T":"b","S":s,"o":o,"h":max(o, c)*1.001,"l":min(o, c)*0.999,"c":c,"v":random.randint(1000, 5000),"t":clock.isoformat()+"Z"})
+                clock += dt.timedelta(minutes=1)
+                try:
+                    if out: send(out)
+                except OSError: return
+        threading.Thread(target=pump, daemon=True).start()
+        if self.server.bar_every: threading.Thread(target=pump_bars, daemon=True).start()
+        try:
+            while True:
+                op, data = read_frame(sock)
+                if op == 0x8: break
+                if op == 0x9: send_frame(sock, data, 0xA); continue
+                msg = json.loads(data)
+                if msg.get("action") == "auth": send([{"T":"success","msg":"authenticated"}])
+                elif msg.get("action") == "subscribe":
+                    subs.update(msg.get("trades", [])); bar_subs.update(msg.get("bars", []))
+                    send([{"T":"subscription","trades":sorted(subs),"bars":sorted(bar_subs)}])
+        except (ConnectionError, OSError): pass
+        finally: alive[0] = False
+def serve(port=8765, every=0.5, bar_every=0.0):
+    ThreadingTCPServer.allow_reuse_address = True; ThreadingTCPServer.daemon_threads = True
+    srv = ThreadingTCPServer(("127.0.0.1", port), Handler); srv.every = every; srv.bar_every = bar_every
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(); ap.add_argument("--port", type=int, default=8765); ap.add_argument("--every", type=float, default=0.5)
+    ap.add_argument("--bar-every", type=float, default=0.0)
+    a = ap.parse_args(); serve(a.port, a.every, a.bar_every); print(f"fake stream on ws://127.0.0.1:{a.port}")
+    while True: time.sleep(3600)